@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import numpy as np
+import aero_tables
+import atmosphere
+import path
+
+GRID_VERSION = 1
+
+# Поля сетки (последняя ось массива values)
+FIELDS = ('CX', 'CY', 'E', 'focus_position')
+
+# Диапазоны и разрешение сетки по умолчанию: Мах, высота (м), угол атаки (рад)
+MACH_RANGE = (0.05, 10.0)
+ALTITUDE_RANGE = (0.0, 90000.0)
+ALPHA_RANGE = (-0.7, 0.7)
+RESOLUTION = (200, 91, 56)
+
+def geometry_key(stream, mach, altitude, alpha):
+    """Хеш геометрии, осей сетки и аэродинамических таблиц"""
+    geometry = [(e.upper_diameter, e.lower_diameter, e.elem_length) for e in stream.elem]
+    h = hashlib.sha1(json.dumps([GRID_VERSION, geometry]).encode())
+    for axis in (mach, altitude, alpha):
+        h.update(np.ascontiguousarray(axis, dtype=np.float64).tobytes())
+    for name in sorted(aero_tables.TABLE_SHAPES):
+        h.update(aero_tables.get_table(name).tobytes())
+    return h.hexdigest()[:16]
+
+class AeroGrid:
+    """
+    Таблица CX, CY, E и положения фокуса на равномерной сетке
+    Мах x высота x угол атаки для одной геометрии UnionStream.
+    Вне сетки значения считаются точно через UnionStream.
+    """
+    def __init__(self, stream, mach, altitude, alpha, values, sound_speed):
+        self.stream = stream
+        self.mach = mach
+        self.altitude = altitude
+        self.alpha = alpha
+        self.values = values
+        self.sound_speed = sound_speed
+        self.full_length = stream.full_length
+        self.key = geometry_key(stream, mach, altitude, alpha)
+        # ячейка по Маху, содержащая разрыв донного давления при M = 1: интерполяция
+        # через скачок дает ошибку CX ~10%, точки [mach[n], mach[n+1]) считаются точно
+        n = np.searchsorted(mach, 1.0) - 1
+        self._transonic = (mach[n], mach[n + 1]) if 0 <= n < len(mach) - 1 else (np.inf, np.inf)
+
+        self._origin = (mach[0], altitude[0], alpha[0])
+        self._step = (mach[1] - mach[0], altitude[1] - altitude[0], alpha[1] - alpha[0])
+        self._shape = values.shape[:3]
+        self._flat = values.reshape(-1, values.shape[-1])
+        # смещения вершин ячейки в плоском массиве: (i, j, k), (i+1, j, k), (i, j, k+1), ..., (i+1, j+1, k+1)
+        di, dj = self._shape[1] * self._shape[2], self._shape[2]
+        self._corners = np.array([0, di, 1, di + 1, dj, di + dj, dj + 1, di + dj + 1])
+
+    @staticmethod
+    def axes(mach_range=MACH_RANGE, altitude_range=ALTITUDE_RANGE, alpha_range=ALPHA_RANGE, resolution=RESOLUTION):
+        return (np.linspace(mach_range[0], mach_range[1], resolution[0]),
+                np.linspace(altitude_range[0], altitude_range[1], resolution[1]),
+                np.linspace(alpha_range[0], alpha_range[1], resolution[2]))
+
+    @classmethod
+    def build(cls, stream, mach_range=MACH_RANGE, altitude_range=ALTITUDE_RANGE, alpha_range=ALPHA_RANGE, resolution=RESOLUTION):
+        mach, altitude, alpha = cls.axes(mach_range, altitude_range, alpha_range, resolution)
+
+        sound_speed = atmosphere.atmosphere_profile(altitude).SV
+        M, H, A = np.meshgrid(mach, altitude, alpha, indexing='ij')
+        velocity = M * sound_speed[np.newaxis, :, np.newaxis]
+        res = stream.calculate_CXY_batch(velocity, H, A)
+        values = np.stack([res.CX, res.CY, res.E, res.focus_position], axis=-1)
+        return cls(stream, mach, altitude, alpha, values, sound_speed)
+
+    @classmethod
+    def load_or_build(cls, stream, mach_range=MACH_RANGE, altitude_range=ALTITUDE_RANGE, alpha_range=ALPHA_RANGE,
+                      resolution=RESOLUTION, cache_dir=None):
+        """Сетка из кэша на диске (по хешу геометрии) или построение и сохранение новой"""
+        mach, altitude, alpha = cls.axes(mach_range, altitude_range, alpha_range, resolution)
+        cache_dir = path.cache_path if cache_dir is None else cache_dir
+        filename = os.path.join(cache_dir, "aero_" + geometry_key(stream, mach, altitude, alpha) + ".npz")
+        if os.path.exists(filename):
+            with np.load(filename) as data:
+                return cls(stream, data['mach'], data['altitude'], data['alpha'], data['values'], data['sound_speed'])
+
+        grid = cls.build(stream, mach_range, altitude_range, alpha_range, resolution)
+        grid.save(filename)
+        return grid
+
+    def save(self, filename):
+        # запись через временный файл: параллельные процессы не видят недописанную сетку
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        temp = f"{filename}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            np.savez(f, mach=self.mach, altitude=self.altitude, alpha=self.alpha,
+                     values=self.values, sound_speed=self.sound_speed)
+        os.replace(temp, filename)
+
+    def _cell(self, x, axis):
+        """Индекс ячейки и доля внутри нее; None вне сетки"""
+        last = self._shape[axis] - 1
+        u = (x - self._origin[axis]) / self._step[axis]
+        if not 0 <= u <= last:
+            return None
+        i = min(int(u), last - 1)
+        return i, u - i
+
+    def lookup(self, velocity, altitude, attack_angle):
+        """
+        (CX, CY, E, focus_position) в точке; вне сетки - точный расчет
+        """
+        h = self._cell(altitude, 1)
+        if h is not None:
+            j, wh = h
+            sound_speed = self.sound_speed[j] + wh * (self.sound_speed[j + 1] - self.sound_speed[j])
+            Mach = velocity / sound_speed
+            m = self._cell(Mach, 0)
+            a = self._cell(attack_angle, 2)
+            if m is not None and a is not None and not self._transonic[0] <= Mach < self._transonic[1]:
+                i, wm = m
+                k, wa = a
+                c = self.values[i:i + 2, j:j + 2, k:k + 2]
+                c = c[0] + wm * (c[1] - c[0])
+                c = c[0] + wh * (c[1] - c[0])
+                c = c[0] + wa * (c[1] - c[0])
+                return c[0], c[1], c[2], c[3]
+
+        self.stream.calculate_CXY_exact(velocity, altitude, attack_angle)
+        return self.stream.CX, self.stream.CY, self.stream.E, self.stream.focus_position
+
+    def lookup_batch(self, velocity, altitude, attack_angle, clamp=False):
+        """
+        Векторный lookup: массивы CX, CY, E, focus_position.
+        clamp=True - точки вне сетки берутся с ее границы без точного расчета
+        (трансзвуковая ячейка внутри сетки по высоте считается точно и в этом режиме)
+        """
+        velocity = np.asarray(velocity, dtype=np.float64)
+        altitude = np.asarray(altitude, dtype=np.float64)
+        attack_angle = np.asarray(attack_angle, dtype=np.float64)
+
+        def cell(x, axis):
+            last = self._shape[axis] - 1
+            u = (x - self._origin[axis]) / self._step[axis]
+            if clamp:
+                u = np.minimum(np.maximum(u, 0), last)
+                inside = True
+            else:
+                inside = (u >= 0) & (u <= last)
+                u = np.where(inside, u, 0)
+            i = np.minimum(u.astype(np.intp), last - 1)
+            return i, u - i, inside
+
+        j, wh, inside_h = cell(altitude, 1)
+        sound_speed = self.sound_speed[j] + wh * (self.sound_speed[j + 1] - self.sound_speed[j])
+        Mach = velocity / sound_speed
+        i, wm, inside_m = cell(Mach, 0)
+        k, wa, inside_a = cell(attack_angle, 2)
+
+        # восемь вершин ячейки одной выборкой из плоского массива узлов
+        v = self._flat[((i * self._shape[1] + j) * self._shape[2] + k)[..., np.newaxis] + self._corners]
+        # интерполяция по Маху сразу для четырех ребер (c00, c01, c10, c11), затем по высоте и углу
+        c = v[..., 0::2, :] + wm[..., np.newaxis, np.newaxis] * (v[..., 1::2, :] - v[..., 0::2, :])
+        c = c[..., 0:2, :] + wh[..., np.newaxis, np.newaxis] * (c[..., 2:4, :] - c[..., 0:2, :])
+        res = c[..., 0, :] + wa[..., np.newaxis] * (c[..., 1, :] - c[..., 0, :])
+
+        transonic = (self._transonic[0] <= Mach) & (Mach < self._transonic[1])
+        outside = transonic & inside_h if clamp else transonic | ~(inside_h & inside_m & inside_a)
+        if outside.any():
+            velocity, altitude, attack_angle = np.broadcast_arrays(velocity, altitude, attack_angle)
+            exact = self.stream.calculate_CXY_batch(velocity[outside], altitude[outside], attack_angle[outside])
+            res[outside] = np.stack([exact.CX, exact.CY, exact.E, exact.focus_position], axis=-1)
+        return res[..., 0], res[..., 1], res[..., 2], res[..., 3]
+
+    def max_error(self, samples=2000, seed=0):
+        """Максимальная абсолютная ошибка интерполяции по полям на случайных точках внутри сетки"""
+        rng = np.random.default_rng(seed)
+        H = rng.uniform(self.altitude[0], self.altitude[-1], samples)
+        M = rng.uniform(self.mach[0], self.mach[-1], samples)
+        A = rng.uniform(self.alpha[0], self.alpha[-1], samples)
+        SS = np.interp(H, self.altitude, self.sound_speed)
+        approx = self.lookup_batch(M * SS, H, A)
+        exact = self.stream.calculate_CXY_batch(M * SS, H, A)
+        return {name: float(np.nanmax(np.abs(a - b))) for name, a, b in zip(FIELDS, approx, exact)}
@@ -0,0 +1,58 @@
+import numpy as np
+import path
+
+# Размеры таблиц в resources/: (строки, столбцы)
+TABLE_SHAPES = {
+    "HeadPressure": (10, 10),
+    "TrianglePressure": (10, 7),
+    "EPressure": (10, 3),
+    "HeadNormal": (9, 6),
+    "TriangleNormal": (9, 6),
+}
+
+_tables = {}
+_load_counts = {name: 0 for name in TABLE_SHAPES}
+
+def read_table(filename, rows, cols):
+    """
+    Чтение таблицы из текстового файла, результат транспонирован:
+    data[0] - столбец Маха, data[1:] - столбцы значений
+    """
+    data = []
+    with open(filename, 'r') as f:
+        for _ in range(rows):
+            line = f.readline()
+            if not line:
+                break
+            parts = line.strip().split()
+            if len(parts) < cols:
+                raise ValueError(f"File {filename} line {_+1} has fewer than {cols} columns")
+            data.append([float(x) for x in parts[:cols]])
+    table = np.array(data, dtype=np.float64).T.copy()
+    table.flags.writeable = False
+    return table
+
+def _load(name):
+    rows, cols = TABLE_SHAPES[name]
+    _tables[name] = read_table(path.root_path + name + ".txt", rows, cols)
+    _load_counts[name] += 1
+    return _tables[name]
+
+def get_table(name):
+    """Возвращает таблицу из реестра, при первом обращении читает файл"""
+    table = _tables.get(name)
+    if table is None:
+        table = _load(name)
+    return table
+
+def reload_tables(names=None):
+    """Перечитывает таблицы с диска (все или только перечисленные)"""
+    for name in (TABLE_SHAPES if names is None else names):
+        _load(name)
+
+def load_counts():
+    """Сколько раз каждая таблица читалась с диска"""
+    return dict(_load_counts)
+
+def total_loads():
+    return sum(_load_counts.values())
@@ -1,9 +1,47 @@
 import math
+from collections import OrderedDict, namedtuple
+import numpy as np
 import matplotlib.pyplot as plt
 import atmosphere
+import aero_tables
+import interpolation
 import path
 import rocket_parser as rp
 
+AeroCoefficients = namedtuple('AeroCoefficients', ['CX', 'CY', 'E', 'focus_position', 'focus_relative', 'Mach'])
+
+def _mach_parameter_scalar(Mach, ratio):
+    if ratio == 0:
+        return 0
+    if Mach < 1:
+        return -math.sqrt(1 - Mach * Mach) / ratio
+    return math.sqrt(Mach * Mach - 1) / ratio
+
+def _mach_parameter(Mach, ratio):
+    """Параметр sqrt(|M^2-1|)/ratio со знаком минус для дозвука"""
+    if ratio == 0:
+        return np.zeros_like(Mach)
+    with np.errstate(invalid='ignore'):
+        return np.where(Mach < 1, -np.sqrt(1 - Mach * Mach), np.sqrt(Mach * Mach - 1)) / ratio
+
+# Величины, зависящие только от геометрии: выбранные столбцы таблиц и
+# коэффициенты элементов. Кортежи по элементам индексируются как self.elem.
+CompiledGeometry = namedtuple('CompiledGeometry', [
+    'head_ratio',       # удлинение носового элемента
+    'head_pressure',    # Table: HeadPressure по удлинению носка
+    'bottom_pressure',  # Table: донное давление на сверхзвуке
+    'head_normal',      # Table: HeadNormal
+    'induced',          # (Mach_v, E_head, E_cone) EPressure
+    'cone_pressure',    # Table: TrianglePressure для каждого элемента
+    'cone_normal',      # Table: TriangleNormal для каждого элемента
+    'area_factor',      # 1 - S_верх/S_низ
+    'area_rat',         # S_верх/S_низ
+    'free_lift',        # free_triangle_lift
+    'lift_weight',      # S_верх/S_миделя в un_triangle_lift
+    'induced_weight',   # S_верх/S_миделя в E_pressure
+    'expanding',        # индексы расширяющихся элементов (кроме носового)
+])
+
 class Element:
     def __init__(self):
         self.upper_diameter = 0.0
@@ -35,6 +73,7 @@ class Geometry:
         self.midel_area = 0.0
         self.cif = 0.0
         self.num = 0.0
+        self.compiled = None
 
     def sqr(self, x):
         return x * x
@@ -59,6 +98,7 @@ class Geometry:
             else:
                 self.elem[i].upper_diameter = diameters[i - 1]
                 self.elem[i].lower_diameter = d
+        self.pre_calculations()
 
     def pre_calculations(self):
         self.full_length = 0.0
@@ -102,6 +142,135 @@ class Geometry:
 
         self.midel_diameter = self.elem[-1].upper_diameter
         self.midel_area = self.elem[-1].lower_area
+        self.compiled = self.compile_geometry()
+
+    def select_ratio_data_pressure(self, ratio, data):
+        # data: [Mach_v, H_0, H_025, H_05, H_1, H_2, H_25, H_3, H_4, H_5]
+        if ratio < 0.25:
+            return [data[0], data[1]]
+        elif ratio < 0.5:
+            return [data[0], data[2]]
+        elif ratio < 1:
+            return [data[0], data[3]]
+        elif ratio < 2:
+            return [data[0], data[4]]
+        elif ratio < 2.5:
+            return [data[0], data[5]]
+        elif ratio < 3:
+            return [data[0], data[7]]
+        elif ratio < 4:
+            return [data[0], data[8]]
+        else:
+            return [data[0], data[9]]
+
+    def select_ratio_data_triangle(self, ratio, data):
+        if ratio >= 1.5 and ratio < 2:
+            return [data[0], data[1]]
+        elif ratio >= 2 and ratio < 2.5:
+            return [data[0], data[2]]
+        elif ratio >= 2.5 and ratio < 3:
+            return [data[0], data[3]]
+        elif ratio >= 3 and ratio < 4:
+            return [data[0], data[4]]
+        elif ratio >= 4:
+            return [data[0], data[5]]
+        else:
+            return [data[0], data[1]]
+
+    def select_ratio_data_head_normal(self, ratio, data):
+        # data: [Mach_v, H_0, H_05, H_1, H_2, H_4]
+        if 0.5 <= ratio < 1:
+            return [data[0], data[2]]
+        elif 1 <= ratio < 2:
+            return [data[0], data[3]]
+        elif 2 <= ratio < 4:
+            return [data[0], data[4]]
+        elif ratio >= 4:
+            return [data[0], data[5]]
+        else:
+            return [data[0], data[1]]
+
+    def select_ratio_data_triangle_normal(self, ratio, data):
+        # data: [Mach_v, H_0, H_1, H_2, H_3, H_4]
+        if 1 <= ratio < 2:
+            return [data[0], data[2]]
+        elif 2 <= ratio < 3:
+            return [data[0], data[3]]
+        elif 3 <= ratio < 4:
+            return [data[0], data[4]]
+        elif ratio >= 4:
+            return [data[0], data[5]]
+        else:
+            return [data[0], data[1]]
+
+    def cylinder_length(self, index):
+        """Длина цилиндрической части за элементом index (как в head_lift/triangle_lift)"""
+        L_cyl = 0.0
+        for j in range(index + 1, len(self.elem)):
+            if self.elem[j].upper_diameter < self.elem[j].lower_diameter:
+                if self.elem[j].lower_diameter != 0:
+                    L_cyl /= self.elem[j].lower_diameter
+                break
+            else:
+                L_cyl += self.elem[j].elem_length
+        return L_cyl
+
+    def compile_geometry(self):
+        """Выбор столбцов таблиц и геометрические коэффициенты, не зависящие от числа Маха"""
+        head_pressure = aero_tables.get_table("HeadPressure")
+        triangle_pressure = aero_tables.get_table("TrianglePressure")
+        head_normal = aero_tables.get_table("HeadNormal")
+        triangle_normal = aero_tables.get_table("TriangleNormal")
+        induced = aero_tables.get_table("EPressure")
+
+        head = self.elem[0]
+        last_area = self.elem[-1].upper_area
+        induced_ratio = last_area if last_area != 0 else 1
+        head_cyl_ratio = self.cylinder_length(0) / head.ratio if head.ratio != 0 else 0
+
+        cone_pressure = [None]
+        cone_normal = [None]
+        area_factor = [0.0]
+        area_rat = [0.0]
+        free_lift = [0.0]
+        expanding = []
+        for i in range(1, len(self.elem)):
+            e = self.elem[i]
+            Mach_v, values = self.select_ratio_data_triangle(e.ratio, triangle_pressure)
+            cone_pressure.append(interpolation.Table(Mach_v, values, float(values[-1])))
+            cyl_ratio = self.cylinder_length(i) / e.ratio if e.ratio != 0 else 0
+            Mach_v, values = self.select_ratio_data_triangle_normal(cyl_ratio, triangle_normal)
+            cone_normal.append(interpolation.Table(Mach_v, values, 0.0))
+            area_factor.append(1 - e.upper_area / e.lower_area if e.lower_area != 0 else 0.0)
+            area_rat.append(e.upper_area / e.lower_area if e.lower_area != 0 else 0)
+
+            arg = e.lower_diameter / 2 / (e.virtual_length - e.elem_length) if (e.virtual_length - e.elem_length) != 0 else 0
+            free_lift.append((2 / 57.3) * self.sqr(math.cos(math.atan(arg))))
+            if e.upper_area < e.lower_area:
+                expanding.append(i)
+
+        Mach_v, values = self.select_ratio_data_pressure(head.ratio, head_pressure)
+        head_table = interpolation.Table(Mach_v, values, float(values[-1]))
+        # 7-й столбец (индекс 6) - как в исходнике
+        bottom_table = interpolation.Table(head_pressure[0], head_pressure[6], float(head_pressure[6][-1]))
+        Mach_v, values = self.select_ratio_data_head_normal(head_cyl_ratio, head_normal)
+        head_normal_table = interpolation.Table(Mach_v, values, 0.035)
+
+        return CompiledGeometry(
+            head_ratio=head.ratio,
+            head_pressure=head_table,
+            bottom_pressure=bottom_table,
+            head_normal=head_normal_table,
+            induced=tuple(tuple(float(x) for x in column) for column in induced[:3]),
+            cone_pressure=tuple(cone_pressure),
+            cone_normal=tuple(cone_normal),
+            area_factor=tuple(area_factor),
+            area_rat=tuple(area_rat),
+            free_lift=tuple(free_lift),
+            lift_weight=tuple(e.upper_area / last_area if last_area != 0 else 0 for e in self.elem),
+            induced_weight=tuple(e.upper_area / induced_ratio for e in self.elem),
+            expanding=tuple(expanding),
+        )
 
 class Friction(Geometry):
     def __init__(self):
@@ -113,34 +282,47 @@ class Friction(Geometry):
         self.x_t = 0.0
         self.C_fric = 0.0
 
-    def stream_calc(self, Re, Mach):
+    def stream_coefficients(self, Re, Mach):
+        """
+        Коэффициенты трения без изменения состояния: (cif, num, n, x_t),
+        n и x_t равны None на ламинарном и турбулентном участках
+        """
+        n = None
+        x_t = None
         if Re <= 485000:
             if (abs(Re)< 0.0001):
-                self.cif = 0
+                cif = 0
             else:
-                self.cif = 2.656 / math.sqrt(Re)
-            self.num = pow(1 + 0.1 * pow(Mach, 0.1), -0.125)
+                cif = 2.656 / math.sqrt(Re)
+            num = pow(1 + 0.1 * pow(Mach, 0.1), -0.125)
         elif Re < 10000000:
             try:
                 log_arg = (self.h_s / self.full_length * Re) - 1
                 denominator = 2.2 + 0.08 * pow(Mach, 2) / (1 + 0.312 * pow(Mach, 2))
-                self.n = 5 + (1.3 + 0.6 * Mach * (1 - 0.25 * pow(Mach, 2))) * math.sqrt(
+                n = 5 + (1.3 + 0.6 * Mach * (1 - 0.25 * pow(Mach, 2))) * math.sqrt(
                     1 - pow(math.log10(log_arg) / denominator, 2))
             except (ValueError, ZeroDivisionError):
-                self.n = 5
+                n = 5
 
-            self.x_t = min(pow(10, self.n) / Re, self.elem[0].elem_length / self.full_length)
-            if self.x_t >= 1:
-                self.cif = 0.91 / pow(math.log10(Re), 2.58) * pow(1 - self.x_t + 40 * pow(self.x_t, 0.625) / pow(Re, 0.375), 0.8)
+            x_t = min(pow(10, n) / Re, self.elem[0].elem_length / self.full_length)
+            if x_t >= 1:
+                cif = 0.91 / pow(math.log10(Re), 2.58) * pow(1 - x_t + 40 * pow(x_t, 0.625) / pow(Re, 0.375), 0.8)
             else:
                 if (abs(Re)< 0.0001):
-                    self.cif = 0
+                    cif = 0
                 else:
-                    self.cif = 2.656 / math.sqrt(Re)
-            self.num = pow(1 + 0.1 * pow(Mach, 0.1), -2 / 3)
+                    cif = 2.656 / math.sqrt(Re)
+            num = pow(1 + 0.1 * pow(Mach, 0.1), -2 / 3)
         else:
-            self.cif = 0.91 / pow(math.log10(Re), 2.58)
-            self.num = pow(1 + 0.1 * pow(Mach, 0.1), -2 / 3)
+            cif = 0.91 / pow(math.log10(Re), 2.58)
+            num = pow(1 + 0.1 * pow(Mach, 0.1), -2 / 3)
+        return cif, num, n, x_t
+
+    def stream_calc(self, Re, Mach):
+        self.cif, self.num, n, x_t = self.stream_coefficients(Re, Mach)
+        if n is not None:
+            self.n = n
+            self.x_t = x_t
 
     def fricalc(self, Mach, SS, nu):
         if nu == None:
@@ -158,61 +340,39 @@ class Friction(Geometry):
         self.C_fric = self.area_ratio * self.cif * self.num / 2
         return self.C_fric
 
+    def stream_calc_batch(self, Re, Mach):
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            cif_lam = np.where(np.abs(Re) < 0.0001, 0.0, 2.656 / np.sqrt(Re))
+            cif_turb = 0.91 / np.log10(Re) ** 2.58
+            num_lam = (1 + 0.1 * Mach ** 0.1) ** -0.125
+            num_turb = (1 + 0.1 * Mach ** 0.1) ** (-2 / 3)
+
+            log_arg = (self.h_s / self.full_length * Re) - 1 if self.full_length != 0 else np.full_like(Re, np.nan)
+            denominator = 2.2 + 0.08 * Mach ** 2 / (1 + 0.312 * Mach ** 2)
+            n = 5 + (1.3 + 0.6 * Mach * (1 - 0.25 * Mach ** 2)) * np.sqrt(
+                1 - (np.log10(log_arg) / denominator) ** 2)
+            n = np.where(np.isfinite(n), n, 5)
+            x_t = np.minimum(10.0 ** n / Re, self.elem[0].elem_length / self.full_length if self.full_length != 0 else np.inf)
+            cif_mid = np.where(x_t >= 1,
+                               cif_turb * (1 - x_t + 40 * x_t ** 0.625 / Re ** 0.375) ** 0.8,
+                               cif_lam)
+
+        cif = np.where(Re <= 485000, cif_lam, np.where(Re < 10000000, cif_mid, cif_turb))
+        num = np.where(Re <= 485000, num_lam, num_turb)
+        return cif, num
+
+    def fricalc_batch(self, Mach, SS, nu):
+        """Векторный аналог fricalc, возвращает (C_fric, cif, num) без изменения состояния"""
+        nu = np.where(np.isnan(nu), 1.789e-05, nu)
+        area_ratio = 0 if self.midel_area == 0 else self.full_round_area / self.midel_area
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Re = np.where(nu != 0, SS * Mach * self.full_length / nu, 0.0)
+        cif, num = self.stream_calc_batch(Re, Mach)
+        return area_ratio * cif * num / 2, cif, num
+
 class Pressure(Geometry):
     def read_pressure_file(self, filename, rows, cols):
-        data = []
-        with open(filename, 'r') as f:
-            for _ in range(rows):
-                line = f.readline()
-                if not line:
-                    break
-                parts = line.strip().split()
-                if len(parts) < cols:
-                    raise ValueError(f"File {filename} line {_+1} has fewer than {cols} columns")
-                data.append([float(x) for x in parts[:cols]])
-        transposed = list(map(list, zip(*data)))
-        return transposed
-
-    def interpolate_Mach(self, Mach, data):
-        Mach_v = data[0]
-        values = data[1]
-        for i in range(1, len(Mach_v)):
-            if Mach >= Mach_v[i - 1] and Mach < Mach_v[i]:
-                return values[i - 1] + (Mach - Mach_v[i - 1]) * (values[i] - values[i - 1]) / (Mach_v[i] - Mach_v[i - 1])
-        return values[-1]
-
-    def select_ratio_data_pressure(self, ratio, data):
-        # data: [Mach_v, H_0, H_025, H_05, H_1, H_2, H_25, H_3, H_4, H_5]
-        if ratio < 0.25:
-            return [data[0], data[1]]
-        elif ratio < 0.5:
-            return [data[0], data[2]]
-        elif ratio < 1:
-            return [data[0], data[3]]
-        elif ratio < 2:
-            return [data[0], data[4]]
-        elif ratio < 2.5:
-            return [data[0], data[5]]
-        elif ratio < 3:
-            return [data[0], data[7]]
-        elif ratio < 4:
-            return [data[0], data[8]]
-        else:
-            return [data[0], data[9]]
-
-    def select_ratio_data_triangle(self, ratio, data):
-        if ratio >= 1.5 and ratio < 2:
-            return [data[0], data[1]]
-        elif ratio >= 2 and ratio < 2.5:
-            return [data[0], data[2]]
-        elif ratio >= 2.5 and ratio < 3:
-            return [data[0], data[3]]
-        elif ratio >= 3 and ratio < 4:
-            return [data[0], data[4]]
-        elif ratio >= 4:
-            return [data[0], data[5]]
-        else:
-            return [data[0], data[1]]
+        return aero_tables.read_table(filename, rows, cols)
 
     def bottom_pres(self, Mach):
         if Mach < 1:
@@ -220,42 +380,35 @@ class Pressure(Geometry):
                 return 0
             return 0.0155 / math.sqrt(self.cif * self.num * self.full_ratio)
         else:
-            data = self.read_pressure_file(path.root_path + "HeadPressure.txt", 10, 10)
-            # 7-й столбец (индекс 6) - как в исходнике
-            return self.interpolate_Mach(Mach, [data[0], data[6]])
+            return self.compiled.bottom_pressure(Mach)
 
     def head_Cpres(self, Mach):
-        data = self.read_pressure_file(path.root_path + "HeadPressure.txt", 10, 10)
-        ratio = self.elem[0].ratio
-        H_current = self.select_ratio_data_pressure(ratio, data)
-        return self.interpolate_Mach(Mach, H_current)
-
-    def triangle_Cpres(self, Mach, ratio):
-        data = self.read_pressure_file(path.root_path + "TrianglePressure.txt", 10, 7)
-        H_current = self.select_ratio_data_triangle(ratio, data)
-        return self.interpolate_Mach(Mach, H_current)
+        return self.compiled.head_pressure(Mach)
 
     def prescalc(self, Mach):
         res = 0.0
+        c = self.compiled
         for i in range(1, len(self.elem)):
-            self.elem[i].C_pres = self.triangle_Cpres(Mach, self.elem[i].ratio) * (1 - self.elem[i].upper_area / self.elem[i].lower_area)
+            self.elem[i].C_pres = c.cone_pressure[i](Mach) * c.area_factor[i]
             res += self.elem[i].C_pres
         return res + self.head_Cpres(Mach) + self.bottom_pres(Mach)
 
+    def prescalc_batch(self, Mach, cif, num):
+        c = self.compiled
+        res = c.head_pressure.array(Mach)
+
+        product = cif * num * self.full_ratio
+        with np.errstate(divide='ignore', invalid='ignore'):
+            subsonic = np.where(product == 0, 0.0, 0.0155 / np.sqrt(product))
+        res = res + np.where(Mach < 1, subsonic, c.bottom_pressure.array(Mach))
+
+        for i in range(1, len(self.elem)):
+            res = res + c.cone_pressure[i].array(Mach) * c.area_factor[i]
+        return res
+
 class Inductance(Geometry):
     def read_pressure_file(self, filename, rows, cols):
-        data = []
-        with open(filename, 'r') as f:
-            for _ in range(rows):
-                line = f.readline()
-                if not line:
-                    break
-                parts = line.strip().split()
-                if len(parts) < cols:
-                    raise ValueError(f"File {filename} line {_+1} has fewer than {cols} columns")
-                data.append([float(x) for x in parts[:cols]])
-        transposed = list(map(list, zip(*data)))
-        return transposed
+        return aero_tables.read_table(filename, rows, cols)
 
     def sqr(self, x):
         return x * x
@@ -264,33 +417,42 @@ class Inductance(Geometry):
         return x / 57.3
 
     def E_pressure(self, angle, Mach):
-        N = 10
-        data = self.read_pressure_file(path.root_path + "EPressure.txt", N, 3)
-        Mach_v = data[0]
-        H_head = data[1]
-        H_cone = data[2]
-
-        if Mach < 1:
-            Mach_val = -math.sqrt(1 - self.sqr(Mach)) / self.elem[0].ratio if self.elem[0].ratio != 0 else 0
-        else:
-            Mach_val = math.sqrt(self.sqr(Mach) - 1) / self.elem[0].ratio if self.elem[0].ratio != 0 else 0
-
-        E_head = 0
-        E_cone = 0
-        for i in range(1, N):
-            if Mach_val >= Mach_v[i - 1] and Mach_val < Mach_v[i]:
-                E_head = H_head[i - 1] + (Mach_val - Mach_v[i - 1]) * (H_head[i] - H_head[i - 1]) / (Mach_v[i] - Mach_v[i - 1])
-                E_cone = H_cone[i - 1] + (Mach_val - Mach_v[i - 1]) * (H_cone[i] - H_cone[i - 1]) / (Mach_v[i] - Mach_v[i - 1])
+        c = self.compiled
+        E_head, E_cone = self.induced_terms(_mach_parameter_scalar(Mach, c.head_ratio))
 
         self.elem[0].C_ind = (self.elem[0].CY + self.rad(2 * E_head)) * self.sqr(angle)
-        for j in range(1, len(self.elem)):
-            if self.elem[j].upper_diameter < self.elem[j].lower_diameter:
-                ratio = self.elem[-1].upper_area if self.elem[-1].upper_area != 0 else 1
-                self.elem[j].C_ind = (self.elem[j].CY * self.elem[j].upper_area / ratio + self.rad(2 * E_cone * self.elem[j].upper_area / ratio)) * self.sqr(angle)
+        for j in c.expanding:
+            weight = c.induced_weight[j]
+            self.elem[j].C_ind = (self.elem[j].CY * weight + self.rad(2 * E_cone * weight)) * self.sqr(angle)
 
         E = sum(e.C_ind for e in self.elem)
         return E
 
+    def induced_terms(self, Mach_val):
+        """E_head и E_cone из EPressure: один поиск интервала на оба столбца, вне таблицы 0"""
+        Mach_v, H_head, H_cone = self.compiled.induced
+        i = interpolation.interval(Mach_val, Mach_v)
+        if i is None:
+            return 0, 0
+        return interpolation.linear(i, Mach_val, Mach_v, H_head), interpolation.linear(i, Mach_val, Mach_v, H_cone)
+
+    def E_pressure_batch(self, angle, Mach, CY_head, CY_elem):
+        """
+        Векторный аналог E_pressure; CY_head и CY_elem ({индекс: CY}) -
+        результаты lift_batch при тех же числах Маха
+        """
+        c = self.compiled
+        Mach_v, H_head, H_cone = c.induced
+        Mach_val = _mach_parameter(Mach, c.head_ratio)
+        E_head = interpolation.interp_array(Mach_val, Mach_v, H_head, 0.0)
+        E_cone = interpolation.interp_array(Mach_val, Mach_v, H_cone, 0.0)
+
+        E = (CY_head + self.rad(2 * E_head)) * self.sqr(angle)
+        for j, CY in CY_elem.items():
+            weight = c.induced_weight[j]
+            E = E + (CY * weight + self.rad(2 * E_cone * weight)) * self.sqr(angle)
+        return E
+
 class LiftForce(Inductance):
     def sqr(self, x):
         return x * x
@@ -299,120 +461,43 @@ class LiftForce(Inductance):
         return x / 57.3
 
     def head_lift(self, Mach):
-        N = 9
-        data = self.read_pressure_file(path.root_path + "HeadNormal.txt", N, 6)
-        Mah_v = data[0]
-        H_0 = data[1]
-        H_05 = data[2]
-        H_1 = data[3]
-        H_2 = data[4]
-        H_4 = data[5]
-
-        L_cyl = 0.0
-        for j in range(1, len(self.elem)):
-            if self.elem[j].upper_diameter < self.elem[j].lower_diameter:
-                if self.elem[j].lower_diameter != 0:
-                    L_cyl /= self.elem[j].lower_diameter
-                break
-            else:
-                L_cyl += self.elem[j].elem_length
-
-        ratio = L_cyl / self.elem[0].ratio if self.elem[0].ratio != 0 else 0
-
-        H_current = []
-        for i in range(N):
-            if 0 <= ratio < 0.5:
-                H_current.append(H_0[i])
-            elif 0.5 <= ratio < 1:
-                H_current.append(H_05[i])
-            elif 1 <= ratio < 2:
-                H_current.append(H_1[i])
-            elif 2 <= ratio < 4:
-                H_current.append(H_2[i])
-            elif ratio >= 4:
-                H_current.append(H_4[i])
-            else:
-                H_current.append(H_0[i])
-
-        if Mach < 1:
-            Mach_val = -math.sqrt(1 - self.sqr(Mach)) / self.elem[0].ratio if self.elem[0].ratio != 0 else 0
-        else:
-            Mach_val = math.sqrt(self.sqr(Mach) - 1) / self.elem[0].ratio if self.elem[0].ratio != 0 else 0
-
-        C_head = 0.035
-        for i in range(1, N):
-            if Mach_val >= Mah_v[i - 1] and Mach_val < Mah_v[i]:
-                C_head = H_current[i - 1] + (Mach_val - Mah_v[i - 1]) * (H_current[i] - H_current[i - 1]) / (Mah_v[i] - Mah_v[i - 1])
-
+        c = self.compiled
+        C_head = c.head_normal(_mach_parameter_scalar(Mach, c.head_ratio))
         self.elem[0].CY = C_head
         return C_head
 
     def free_triangle_lift(self, index):
-        arg = self.elem[index].lower_diameter / 2 / (self.elem[index].virtual_length - self.elem[index].elem_length) if (self.elem[index].virtual_length - self.elem[index].elem_length) != 0 else 0
-        Q = math.atan(arg)
-        return (2 / 57.3) * self.sqr(math.cos(Q))
+        return self.compiled.free_lift[index]
 
     def triangle_lift(self, Mach, ratio, index):
-        N = 9
-        data = self.read_pressure_file(path.root_path + "TriangleNormal.txt", N, 6)
-        Mah_v = data[0]
-        H_0 = data[1]
-        H_1 = data[2]
-        H_2 = data[3]
-        H_3 = data[4]
-        H_4 = data[5]
-
-        L_cyl = 0.0
-        for j in range(index + 1, len(self.elem)):
-            if self.elem[j].upper_diameter < self.elem[j].lower_diameter:
-                if self.elem[j].lower_diameter != 0:
-                    L_cyl /= self.elem[j].lower_diameter
-                break
-            else:
-                L_cyl += self.elem[j].elem_length
-
-        ratio_new = L_cyl / ratio if ratio != 0 else 0
-
-        H_current = []
-        for i in range(N):
-            if 0 < ratio_new < 1:
-                H_current.append(H_0[i])
-            elif 1 <= ratio_new < 2:
-                H_current.append(H_1[i])
-            elif 2 <= ratio_new < 3:
-                H_current.append(H_2[i])
-            elif 3 <= ratio_new < 4:
-                H_current.append(H_3[i])
-            elif ratio_new >= 4:
-                H_current.append(H_4[i])
-            else:
-                H_current.append(H_0[i])
-
-        if Mach < 1:
-            Mach_val = -math.sqrt(1 - self.sqr(Mach)) / ratio if ratio != 0 else 0
-        else:
-            Mach_val = math.sqrt(self.sqr(Mach) - 1) / ratio if ratio != 0 else 0
-
-        C_head = 0.0
-        for i in range(1, N):
-            if Mach_val >= Mah_v[i - 1] and Mach_val < Mah_v[i]:
-                C_head = H_current[i - 1] + (Mach_val - Mah_v[i - 1]) * (H_current[i] - H_current[i - 1]) / (Mah_v[i] - Mah_v[i - 1])
-
-        return C_head
+        return self.compiled.cone_normal[index](_mach_parameter_scalar(Mach, ratio))
 
     def calculate_CY(self, Mach):
         return self.head_lift(Mach) + self.un_triangle_lift(Mach)
 
     def un_triangle_lift(self, Mach):
         res = 0.0
-        for i in range(1, len(self.elem)):
-            if self.elem[i].upper_area < self.elem[i].lower_area:
-                big_rat = self.elem[i].ratio
-                S_rat = self.elem[i].upper_area / self.elem[i].lower_area if self.elem[i].lower_area != 0 else 0
-                self.elem[i].CY = self.triangle_lift(Mach, big_rat, i) - self.free_triangle_lift(i) * S_rat
-                res += self.elem[i].CY * self.elem[i].upper_area / self.elem[-1].upper_area if self.elem[-1].upper_area != 0 else 0
+        c = self.compiled
+        for i in c.expanding:
+            self.elem[i].CY = self.triangle_lift(Mach, self.elem[i].ratio, i) - c.free_lift[i] * c.area_rat[i]
+            res += self.elem[i].CY * c.lift_weight[i]
         return res
 
+    def lift_batch(self, Mach):
+        """
+        Векторный аналог calculate_CY: возвращает (CY, CY_head, {индекс: CY элемента})
+        для расширяющихся элементов
+        """
+        c = self.compiled
+        CY_head = c.head_normal.array(_mach_parameter(Mach, c.head_ratio))
+
+        CY = CY_head
+        CY_elem = {}
+        for i in c.expanding:
+            CY_elem[i] = c.cone_normal[i].array(_mach_parameter(Mach, self.elem[i].ratio)) - c.free_lift[i] * c.area_rat[i]
+            CY = CY + CY_elem[i] * c.lift_weight[i]
+        return CY, CY_head, CY_elem
+
 class DragForce(Friction, Pressure):
     def calculate_CX(self, Mach, SS, nu):
         return self.fricalc(Mach, SS, nu) + self.prescalc(Mach)
@@ -425,61 +510,222 @@ class UnionStream(DragForce, LiftForce):
         self.CY = 0.0
         self.focus_position = 0.0
         self.focus_relative = 0.0
+        self.aero_grid = None
+        self.mach_cache = None
+        self.mach_cache_resolution = 1e-3
+        self.mach_cache_maxsize = 1024
+        self.mach_cache_hits = 0
+        self.mach_cache_misses = 0
+        self.mach_cache_evictions = 0
 
-    def calculate_aerodynamic_focus(self, velocity, altitude, attack_angle):
+    def pre_calculations(self):
+        super().pre_calculations()
+        # Сетка коэффициентов и кэш по Маху построены для прежней геометрии
+        self.aero_grid = None
+        self.clear_mach_cache()
+
+    def use_aero_grid(self, grid):
+        """Табличный режим: calculate_CXY берет значения из сетки aero_grid.AeroGrid (None - отключить)"""
+        self.aero_grid = grid
 
-        A = atmosphere.atmosphere(altitude)
-        if A.get_SV() is None:
+    def calculate_aerodynamic_focus(self, velocity, altitude, attack_angle):
+        res = self.evaluate(velocity, altitude, attack_angle)
+        if res is None:
             return 0.0, 0.0
-        
-        Mach = velocity / A.get_SV()
-        
-        self.calculate_CY(Mach)
-        self.E_pressure(attack_angle, Mach)
-        
-        total_moment = 0.0
-        total_normal_force = 0.0
-        
-        for i, elem in enumerate(self.elem):
-            if i == 0:
-                nose_cy = self.head_lift(Mach)
-                nose_normal_force = nose_cy * attack_angle
-                total_normal_force += nose_normal_force
-                total_moment += nose_normal_force * elem.focus_position
-                
-            else:
-                if elem.upper_diameter < elem.lower_diameter:
-                    big_rat = elem.ratio
-                    S_rat = elem.upper_area / elem.lower_area if elem.lower_area != 0 else 0
-                    elem_cy = self.triangle_lift(Mach, big_rat, i) - self.free_triangle_lift(i) * S_rat
-                    elem_normal_force = elem_cy * attack_angle * elem.upper_area / self.elem[-1].upper_area if self.elem[-1].upper_area != 0 else 0
-                else:
-                    elem_normal_force = elem.C_ind * attack_angle
-                
-                total_normal_force += elem_normal_force
-                total_moment += elem_normal_force * elem.focus_position
-        
+
+        self.focus_position = res.focus_position
+        self.focus_relative = res.focus_relative
+        return self.focus_position, self.focus_relative
+
+    def evaluate(self, velocity, altitude, attack_angle, atm=None):
+        """
+        Однопроходный расчет атмосферы, числа Маха, CX, CY, E и фокуса.
+        Каждая таблица интерполируется один раз, состояние объекта не меняется.
+        atm - уже рассчитанная atmosphere(altitude), чтобы не строить ее повторно.
+        Возвращает AeroCoefficients или None, если скорость звука не определена.
+        """
+        A = atmosphere.atmosphere(altitude) if atm is None else atm
+        SS = A.get_SV()
+        if SS is None:
+            return None
+        Mach = velocity / SS
+        c = self.compiled
+
+        # Трение
+        nu = A.get_dyn()
+        if nu is None:
+            nu = 1.789e-05
+        area_ratio = self.full_round_area / self.midel_area if self.midel_area != 0 else 0
+        Re = SS * Mach * self.full_length / nu if nu != 0 else 0
+        cif, num, _, _ = self.stream_coefficients(Re, Mach)
+        CX = area_ratio * cif * num / 2
+
+        if self.mach_cache is None:
+            pressure, bottom, CY_head, E_head, E_cone, elem_cys = self.mach_terms(Mach)
+        else:
+            pressure, bottom, CY_head, E_head, E_cone, elem_cys = self.cached_mach_terms(Mach)
+
+        # Давление; на дозвуке донное давление зависит от трения
+        CX += pressure
+        if bottom is None:
+            product = cif * num * self.full_ratio
+            CX += 0.0155 / math.sqrt(product) if product != 0 else 0
+        else:
+            CX += bottom
+
+        # Подъемная сила, индуктивное сопротивление и фокус
+        angle_sqr = self.sqr(attack_angle)
+        CY = CY_head
+        E = (CY_head + self.rad(2 * E_head)) * angle_sqr
+        total_normal_force = CY_head * attack_angle
+        total_moment = total_normal_force * self.elem[0].focus_position
+        for i, elem_cy in zip(c.expanding, elem_cys):
+            CY += elem_cy * c.lift_weight[i]
+            E += (elem_cy * c.induced_weight[i] + self.rad(2 * E_cone * c.induced_weight[i])) * angle_sqr
+            elem_normal_force = elem_cy * attack_angle * c.lift_weight[i]
+            total_normal_force += elem_normal_force
+            total_moment += elem_normal_force * self.elem[i].focus_position
+
         if total_normal_force != 0:
-            self.focus_position = total_moment / total_normal_force
-            self.focus_relative = self.focus_position / self.full_length if self.full_length != 0 else 0
+            focus_position = total_moment / total_normal_force
+            focus_relative = focus_position / self.full_length if self.full_length != 0 else 0
         else:
-            self.focus_position = self.full_length / 2
-            self.focus_relative = 0.5
-        
-        return self.focus_position, self.focus_relative
+            focus_position = self.full_length / 2
+            focus_relative = 0.5
+
+        CX += CY + E
+        CY = (CY - self.rad(CY + E)) * attack_angle
+        return AeroCoefficients(CX, CY, E, focus_position, focus_relative, Mach)
+
+    def mach_terms(self, Mach):
+        """
+        Слагаемые, зависящие только от числа Маха при заданной геометрии:
+        (давление носка и конусов, донное давление на сверхзвуке или None,
+        CY носка, E_head, E_cone, CY расширяющихся элементов)
+        """
+        c = self.compiled
+        pressure = 0.0
+        for i in range(1, len(self.elem)):
+            pressure += c.cone_pressure[i](Mach) * c.area_factor[i]
+        pressure += c.head_pressure(Mach)
+        bottom = None if Mach < 1 else c.bottom_pressure(Mach)
+
+        Mach_val = _mach_parameter_scalar(Mach, c.head_ratio)
+        CY_head = c.head_normal(Mach_val)
+        E_head, E_cone = self.induced_terms(Mach_val)
+
+        elem_cys = []
+        for i in c.expanding:
+            elem_cys.append(c.cone_normal[i](_mach_parameter_scalar(Mach, self.elem[i].ratio))
+                            - c.free_lift[i] * c.area_rat[i])
+        return pressure, bottom, CY_head, E_head, E_cone, tuple(elem_cys)
+
+    def enable_mach_cache(self, resolution=1e-3, maxsize=1024):
+        """
+        Включает LRU-кэш mach_terms для evaluate: число Маха округляется
+        до resolution, слагаемые считаются в узле округления
+        """
+        self.mach_cache = OrderedDict()
+        self.mach_cache_resolution = resolution
+        self.mach_cache_maxsize = maxsize
+        self.mach_cache_hits = 0
+        self.mach_cache_misses = 0
+        self.mach_cache_evictions = 0
+
+    def disable_mach_cache(self):
+        self.mach_cache = None
+
+    def clear_mach_cache(self):
+        if self.mach_cache is not None:
+            self.mach_cache.clear()
+
+    def mach_cache_stats(self):
+        return {
+            'hits': self.mach_cache_hits,
+            'misses': self.mach_cache_misses,
+            'evictions': self.mach_cache_evictions,
+            'size': len(self.mach_cache) if self.mach_cache is not None else 0,
+        }
+
+    def cached_mach_terms(self, Mach):
+        # сторона M = 1 входит в ключ: донное давление на дозвуке и сверхзвуке
+        # считается по-разному, узел по ту сторону разрыва дал бы чужую ветвь
+        supersonic = Mach >= 1
+        node = round(Mach / self.mach_cache_resolution)
+        key = (supersonic, node)
+        terms = self.mach_cache.get(key)
+        if terms is not None:
+            self.mach_cache_hits += 1
+            self.mach_cache.move_to_end(key)
+            return terms
+
+        self.mach_cache_misses += 1
+        node_Mach = node * self.mach_cache_resolution
+        if supersonic:
+            node_Mach = max(node_Mach, 1.0)
+        elif node_Mach >= 1:
+            node_Mach = math.nextafter(1.0, 0.0)
+        terms = self.mach_terms(node_Mach)
+        self.mach_cache[key] = terms
+        if len(self.mach_cache) > self.mach_cache_maxsize:
+            self.mach_cache.popitem(last=False)
+            self.mach_cache_evictions += 1
+        return terms
 
     def calculate_CXY(self, velocity, altitude, attack_angle):
-        A = atmosphere.atmosphere(altitude)
-        if (A.get_SV()!=None):
-            Mach = velocity/A.get_SV()
-            self.CX = self.calculate_CX(Mach, A.get_SV(), A.get_dyn())
-            self.CY = self.calculate_CY(Mach)
-            self.E = self.E_pressure(attack_angle, Mach)
-            self.CX += (self.CY + self.E)
-            self.CY -= self.rad(self.CY + self.E)
-            self.CY *= attack_angle
-            
-            self.calculate_aerodynamic_focus(velocity, altitude, attack_angle)
+        if self.aero_grid is not None:
+            self.CX, self.CY, self.E, self.focus_position = self.aero_grid.lookup(velocity, altitude, attack_angle)
+            self.focus_relative = self.focus_position / self.full_length if self.full_length != 0 else 0
+            return
+        self.calculate_CXY_exact(velocity, altitude, attack_angle)
+
+    def calculate_CXY_exact(self, velocity, altitude, attack_angle):
+        res = self.evaluate(velocity, altitude, attack_angle)
+        if res is not None:
+            self.CX, self.CY, self.E, self.focus_position, self.focus_relative, _ = res
+
+    def calculate_CXY_batch(self, velocity, altitude, attack_angle):
+        """
+        Векторный расчет CX, CY, E и положения фокуса для массивов скорости,
+        высоты и угла атаки (рад). Состояние объекта не изменяется.
+        Точки, где атмосфера не определена (H >= 94 км), дают nan.
+        """
+        velocity, altitude, attack_angle = np.broadcast_arrays(
+            np.asarray(velocity, dtype=np.float64),
+            np.asarray(altitude, dtype=np.float64),
+            np.asarray(attack_angle, dtype=np.float64))
+
+        atm = atmosphere.atmosphere_profile(altitude)
+        SS, nu = atm.SV, atm.dyn
+        Mach = velocity / SS
+
+        C_fric, cif, num = self.fricalc_batch(Mach, SS, nu)
+        CX = C_fric + self.prescalc_batch(Mach, cif, num)
+        CY, CY_head, CY_elem = self.lift_batch(Mach)
+        E = self.E_pressure_batch(attack_angle, Mach, CY_head, CY_elem)
+        CX = CX + CY + E
+        CY = (CY - self.rad(CY + E)) * attack_angle
+
+        # Фокус: нормальные силы носового и расширяющихся элементов
+        total_normal_force = CY_head * attack_angle
+        total_moment = total_normal_force * self.elem[0].focus_position
+        if self.elem[-1].upper_area != 0:
+            for i, elem_cy in CY_elem.items():
+                elem_normal_force = elem_cy * attack_angle * self.elem[i].upper_area / self.elem[-1].upper_area
+                total_normal_force = total_normal_force + elem_normal_force
+                total_moment = total_moment + elem_normal_force * self.elem[i].focus_position
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            focus_position = np.where(total_normal_force != 0, total_moment / total_normal_force, self.full_length / 2)
+        if self.full_length != 0:
+            focus_relative = np.where(total_normal_force != 0, focus_position / self.full_length, 0.5)
+        else:
+            focus_relative = np.where(total_normal_force != 0, 0.0, 0.5)
+
+        undefined = np.isnan(SS)
+        focus_position = np.where(undefined, np.nan, focus_position)
+        focus_relative = np.where(undefined, np.nan, focus_relative)
+        return AeroCoefficients(CX, CY, E, focus_position, focus_relative, Mach)
 
 def main():
     parser = rp.rocket_parser(path.rocket_lib + "master_rocket.json")
@@ -492,32 +738,27 @@ def main():
     attack_angles = [2, 4, 6, 8, 10]  # градусы
     altitudes = [0, 10, 20, 40, 60]  # км
 
+    # Вся сетка высота x угол x скорость считается одним векторным вызовом
+    H, A, V = np.meshgrid(np.array(altitudes) * 1000, np.array(attack_angles) / 57.3, arrayVelocity, indexing='ij')
+    res = G.calculate_CXY_batch(V, H, A)
+
     plt.figure(figsize=(14, 6))
     focus_data = []
     for j, alt in enumerate(altitudes):
-        for angle_deg in attack_angles:
-            angle_rad = angle_deg / 57.3
-            CX_list = []
-            CY_list = []
-            focus_positions = []
-            focus_relative_list = []
-            
-            for vel in arrayVelocity:
-                G.calculate_CXY(vel, alt * 1000, angle_rad)
-                CX_list.append(G.CX)
-                CY_list.append(G.CY)
-                focus_positions.append(G.focus_position)
-                focus_relative_list.append(G.focus_relative)
-                
-                # Сохраняем данные для анализа
+        for i, angle_deg in enumerate(attack_angles):
+            CX_list = res.CX[j, i]
+            CY_list = res.CY[j, i]
+
+            # Сохраняем данные для анализа
+            for k, vel in enumerate(arrayVelocity):
                 focus_data.append({
                     'velocity': vel,
                     'altitude': alt,
                     'attack_angle': angle_deg,
-                    'focus_position': G.focus_position,
-                    'focus_relative': G.focus_relative,
-                    'CX': G.CX,
-                    'CY': G.CY
+                    'focus_position': float(res.focus_position[j, i, k]),
+                    'focus_relative': float(res.focus_relative[j, i, k]),
+                    'CX': float(res.CX[j, i, k]),
+                    'CY': float(res.CY[j, i, k])
                 })
         print(focus_data[-1])
 
@@ -1,130 +1,211 @@
 import math
+from collections import namedtuple
+import numpy as np
 import matplotlib.pyplot as plt
+import interpolation
+import profile_bank
+
+HT = [1, 11019, 32000, 47350, 71802, 86152, 104128, 120000, 140000, 160000,
+      200000, 325000, 400000, 600000, 1200000]
+TT = [288.15, 216.65, 228.65, 270.65, 214.65, 186.65, 203.81, 334.417, 559.6,
+      695.6, 834.4, 941.9, 984.65, 995.9, 1000]
+TMM = [288.15, 216.65, 228.65, 270.65, 214.65, 186.65, 212.0, 380.60]
+
+dynH = [0, 5000, 10000, 15000, 20000, 25000, 30000, 40000, 50000, 60000, 80000]
+dynT = [17.89, 15.07, 13.06, 11.45, 10.17, 9.18, 8.38, 7.18, 6.25, 5.52, 4.52]
+
+windH = [100 , 6000, 12000 , 18000 , 24000 , 30000 , 36000, 42000 , 48000, 54000, 60000, 66000, 72000, 78000, 84000, 90000, 94000]
+windV = [1.9 , 8, 15 , 18 , 24 , 12 , 10, 8  ,  6,  5,  4,  3,  3,  2,  2,  1,  0.1]
+
+# Константы стандартной атмосферы, общие для atmosphere и atmosphere_profile
+Mc = 28.964420
+gc = 9.80665
+nc = 25.471 * 10**24
+pc = 101325.0
+Tc = 288.15
+RB = 8314.32
+r = 287.05287
+R = 6371000
+
+# Верхняя граница модели плотности и давления
+H_LIMIT = 94000
+
+# Стандартные профили температуры и ветра; альтернативные берутся из profile_bank
+STANDARD_PROFILE = profile_bank.Profile(HT, TT, windH, windV)
+
+AtmosphereArrays = namedtuple('AtmosphereArrays', ['T', 'P', 'density', 'SV', 'g', 'wind', 'dyn', 'n'])
+
+class _lazy:
+    """
+    Производная величина: считается при первом обращении и сохраняется
+    в слоте '_<имя>' экземпляра
+    """
+    def __init__(self, func):
+        self.func = func
+        self.slot = '_' + func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        try:
+            return getattr(obj, self.slot)
+        except AttributeError:
+            value = self.func(obj)
+            setattr(obj, self.slot, value)
+            return value
 
 class atmosphere:
-    def __init__(self, H):
+    __slots__ = ('H', 'T', 'Tm', 'P', 'g', 'po', 'a', 'dyn', 'wind_velocity',
+                 '_n', '_Pap', '_tCel', '_yyd', '_Hmas', '_vsred', '_lsred', '_omega', '_lamb')
+
+    # Таблицы модели общие для всех экземпляров
+    HT = HT
+    TT = TT
+    TMM = TMM
+    dynH = dynH
+    dynT = dynT
+    windH = windH
+    windV = windV
+
+    _T_table, _wind_table = STANDARD_PROFILE.tables(Tc)
+    _Tm_table = interpolation.Table(HT[:len(TMM)], TMM, Tc)
+    # Используется только первый интервал таблицы вязкости (как и раньше):
+    # выше dynH[1] вязкость остается None
+    _dyn_table = interpolation.Table(dynH[:2], dynT[:2])
+
+    # Константы
+    Mc = Mc
+    gc = gc
+    ac = 340.294
+    Hpc = 8434.5
+    nc = nc
+    pc = pc
+    Tc = Tc
+    vc = 458.94
+    yc = 12.013
+    nuc = 14.607 * 10**-6
+    muc = 17.894 * 10**-6
+    lac = 25.343 * 10**-3
+    omegac = 6.9193 * 10**9
+    poc = 1.2250
+    Na = 602.257 * 10**24
+    RB = RB
+    r = r
+    SOS = 110.4
+    BS = 1.458 * 10**-6
+    hi = 1.4
+    b = 0.365 * 10**-9
+    R = R
+
+    PI = math.pi
+    D = 2.66
+    S = PI * D**2 / 4
+
+    Mol = Mc
+
+    def __init__(self, H, profile=None):
+        """
+        profile - профиль температуры и ветра: profile_bank.Profile или номер
+        в текущем банке profile_bank; None - стандартный профиль
+        """
         self.H = H
 
-        self.HT = [1, 11019, 32000, 47350, 71802, 86152, 104128, 120000, 140000, 160000,
-                   200000, 325000, 400000, 600000, 1200000]
-        self.TT = [288.15, 216.65, 228.65, 270.65, 214.65, 186.65, 203.81, 334.417, 559.6,
-                   695.6, 834.4, 941.9, 984.65, 995.9, 1000]
-        self.TMM = [288.15, 216.65, 228.65, 270.65, 214.65, 186.65, 212.0, 380.60]
-
-        self.dynH = [0, 5000, 10000, 15000, 20000, 25000, 30000, 40000, 50000, 60000, 80000]
-        self.dynT = [17.89, 15.07, 13.06, 11.45, 10.17, 9.18, 8.38, 7.18, 6.25, 5.52, 4.52]
-
-        self.windH =[100 , 6000, 12000 , 18000 , 24000 , 30000 , 36000, 42000 , 48000, 54000, 60000, 66000, 72000, 78000, 84000, 90000, 94000]
-        self.windV=[1.9 , 8, 15 , 18 , 24 , 12 , 10, 8  ,  6,  5,  4,  3,  3,  2,  2,  1,  0.1]
-
-        # Константы
-        self.Mc = 28.964420
-        self.gc = 9.80665
-        self.ac = 340.294
-        self.Hpc = 8434.5
-        self.nc = 25.471 * 10**24
-        self.pc = 101325.0
-        self.Tc = 288.15
-        self.vc = 458.94
-        self.yc = 12.013
-        self.nuc = 14.607 * 10**-6
-        self.muc = 17.894 * 10**-6
-        self.lac = 25.343 * 10**-3
-        self.omegac = 6.9193 * 10**9
-        self.poc = 1.2250
-        self.Na = 602.257 * 10**24
-        self.RB = 8314.32
-        self.r = 287.05287
-        self.SOS = 110.4
-        self.BS = 1.458 * 10**-6
-        self.hi = 1.4
-        self.b = 0.365 * 10**-9
-        self.R = 6371000
-
-        self.PI = math.pi
-        self.D = 2.66
-        self.S = self.PI * self.D**2 / 4
-
         # Инициализация переменных
-        self.T = self.Tc
-        self.Tm = self.Tc * self.Mc / self.Mc  # будет просто Tc
         self.P = self.pc
-        self.n = self.nc
-        self.g = self.gc
-        self.Mol = self.Mc
         self.po = None
         self.a = None
         self.dyn = None
-        self.wind_velocity = 0
         # Вычисления
-        self._calculate()
+        self._calculate(profile)
 
-    def _calculate(self):
+    def _calculate(self, profile=None):
         H = self.H
 
-        # Температура T
-        for i in range(1, 15):
-            if H >= self.HT[i - 1] and H < self.HT[i]:
-                self.T = self.TT[i - 1] + (H - self.HT[i - 1]) * (self.TT[i] - self.TT[i - 1]) / (self.HT[i] - self.HT[i - 1])
-                break
-
-        # Средняя температура Tm
-        for i in range(1, 8):
-            if H >= self.HT[i - 1] and H < self.HT[i]:
-                self.Tm = self.TMM[i - 1] + (H - self.HT[i - 1]) * (self.TMM[i] - self.TMM[i - 1]) / (self.HT[i] - self.HT[i - 1])
-                break
-
-        # Скорость ветра W
-        for i in range(1, 17):
-            if H >= self.windH[i - 1] and H < self.windH[i]:
-                self.wind_velocity = self.windV[i - 1] + (H - self.windH[i - 1]) * (self.windV[i] - self.windV[i - 1]) / (self.windH[i] - self.windH[i - 1])
-                break
-        
+        if profile is None:
+            T_table, wind_table = self._T_table, self._wind_table
+        else:
+            if not isinstance(profile, profile_bank.Profile):
+                profile = profile_bank.get_profile(profile)
+            T_table, wind_table = profile.tables(self.Tc)
 
-        if H < 94000:
-            # Коэффициенты полинома молярной массы
-            B = [46.9083, -29.71210e-5, 12.08693e-10, -1.85675e-15]
-
-            self.Mol = self.Mc
+        # Температура T, средняя температура Tm (стандартные узлы HT до 104 км), скорость ветра W
+        self.T = T = T_table(H)
+        self.Tm = Tm = self._Tm_table(H)
+        self.wind_velocity = wind_table(H)
 
+        if H < H_LIMIT:
             Bett = (7466 * H**3 - 1262795028 * H**2 + 61597340039789 * H - 833732588564247562) * 1e-20
 
+            pp = math.log(101325)
             if abs(Bett) < 1e-7:
-                pp = math.log(101325)
-                Hs = H - 0.1
-                self.P = math.exp(pp - (0.434294 * self.gc / (self.r * self.T)) * (H - 0))
+                self.P = math.exp(pp - (0.434294 * self.gc / (self.r * T)) * (H - 0))
             else:
-                pp = math.log(101325)
-                Hs = H - 0.1
-                self.P = math.exp(pp - (self.gc * math.log((self.Tm + Bett * (H - 0)) / self.Tm)) / (Bett * self.r))
-
-            self.Pap = 101325 * math.exp(-self.gc * H * self.Mc / (self.RB * self.T))
+                self.P = math.exp(pp - (self.gc * math.log((Tm + Bett * (H - 0)) / Tm)) / (Bett * self.r))
 
-            self.po = (self.P * self.Mol) / (self.RB * self.T)
-
-            self.n = 7.243611e22 * self.P / self.T
-
-            self.tCel = self.T - 273.15
-            self.yyd = self.po * self.g
-            self.Hmas = (self.RB / self.Mol) * (self.T / self.g)
-            self.a = 20.046796 * math.sqrt(self.T)
-            self.vsred = 145.50685 * self.T / self.Mol
-            self.lsred = 2.332376e-5 * self.T / self.P
-            self.omega = 6.238629e6 * self.P / math.sqrt(self.T * self.Mol)
-            self.lamb = (2.648151e-3 * self.T**(3/2)) / (self.T + 245.4 * 10**(-(12 / self.T)))
+            self.po = (self.P * self.Mol) / (self.RB * T)
+            self.a = 20.046796 * math.sqrt(T)
 
             if H <= self.dynH[0]:
                 self.dyn = self.dynT[0] * 1e-6
             elif H >= self.dynH[-1]:
                 self.dyn = self.dynT[-1] * 1e-6
             else:
-                for i in range(1, len(self.dynH)):
-                    if H < self.dynH[i]:
-                        self.dyn = (self.dynT[i-1] + (H - self.dynH[i-1]) * (self.dynT[i] - self.dynT[i-1]) / (self.dynH[i] - self.dynH[i-1])) * 1e-6
-                    break
+                dyn = self._dyn_table(H)
+                if dyn is not None:
+                    self.dyn = dyn * 1e-6
 
         self.g = self.gc * (self.R / (self.R + H))**2
 
+    # Производные величины; выше 94 км (кроме n) не определены - None
+
+    @_lazy
+    def n(self):
+        if self.H < H_LIMIT:
+            return 7.243611e22 * self.P / self.T
+        return self.nc
+
+    @_lazy
+    def Pap(self):
+        if self.H < H_LIMIT:
+            return 101325 * math.exp(-self.gc * self.H * self.Mc / (self.RB * self.T))
+
+    @_lazy
+    def tCel(self):
+        if self.H < H_LIMIT:
+            return self.T - 273.15
+
+    @_lazy
+    def yyd(self):
+        # считалось до пересчета g, то есть с gc
+        if self.H < H_LIMIT:
+            return self.po * self.gc
+
+    @_lazy
+    def Hmas(self):
+        if self.H < H_LIMIT:
+            return (self.RB / self.Mol) * (self.T / self.gc)
+
+    @_lazy
+    def vsred(self):
+        if self.H < H_LIMIT:
+            return 145.50685 * self.T / self.Mol
+
+    @_lazy
+    def lsred(self):
+        if self.H < H_LIMIT:
+            return 2.332376e-5 * self.T / self.P
+
+    @_lazy
+    def omega(self):
+        if self.H < H_LIMIT:
+            return 6.238629e6 * self.P / math.sqrt(self.T * self.Mol)
+
+    @_lazy
+    def lamb(self):
+        if self.H < H_LIMIT:
+            return (2.648151e-3 * self.T**(3/2)) / (self.T + 245.4 * 10**(-(12 / self.T)))
+
     def get_T(self):
         return self.T
 
@@ -149,6 +230,44 @@ class atmosphere:
     def get_wind(self):
         return self.wind_velocity
 
+def atmosphere_profile(H, profile=None):
+    """
+    Векторный аналог atmosphere для массива высот H (profile - как в atmosphere).
+    Возвращает AtmosphereArrays; значения, которые класс atmosphere
+    оставляет None (выше 94 км, вязкость вне первого интервала), равны nan.
+    """
+    H = np.asarray(H, dtype=np.float64)
+
+    if profile is None:
+        profile = STANDARD_PROFILE
+    elif not isinstance(profile, profile_bank.Profile):
+        profile = profile_bank.get_profile(profile)
+
+    T = interpolation.interp_array(H, profile.HT, profile.TT, Tc)
+    Tm = interpolation.interp_array(H, HT[:len(TMM)], TMM, Tc)
+    wind = interpolation.interp_array(H, profile.windH, profile.windV, 0.0)
+    g = gc * (R / (R + H))**2
+
+    low = H < H_LIMIT
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        Bett = (7466 * H**3 - 1262795028 * H**2 + 61597340039789 * H - 833732588564247562) * 1e-20
+        pp = math.log(101325)
+        P_flat = np.exp(pp - (0.434294 * gc / (r * T)) * H)
+        P_poly = np.exp(pp - (gc * np.log((Tm + Bett * H) / Tm)) / (Bett * r))
+        P = np.where(np.abs(Bett) < 1e-7, P_flat, P_poly)
+        P = np.where(low, P, pc)
+
+        density = np.where(low, (P * Mc) / (RB * T), np.nan)
+        SV = np.where(low, 20.046796 * np.sqrt(T), np.nan)
+        n = np.where(low, 7.243611e22 * P / T, nc)
+
+    dyn = interpolation.interp_array(H, dynH[:2], dynT[:2]) * 1e-6
+    dyn = np.where(H <= dynH[0], dynT[0] * 1e-6, dyn)
+    dyn = np.where(H >= dynH[-1], dynT[-1] * 1e-6, dyn)
+    dyn = np.where(low, dyn, np.nan)
+
+    return AtmosphereArrays(T, P, density, SV, g, wind, dyn, n)
+
 if __name__ == "__main__":
     atm = atmosphere(10000)
     print("Temperature (K):", atm.get_T())
@@ -168,14 +287,13 @@ if __name__ == "__main__":
     speed_of_sound = []
     atomic_speed = []
 
-    for altitude in altitude_list:
-        atm = atmosphere(altitude*1000)
-        density.append(atm.get_density())
-        temperature.append(atm.get_T())
-        gravity.append(atm.get_AOG())
-        pressure.append(atm.get_pressure())
-        speed_of_sound.append(atm.get_SV())
-        atomic_speed.append(atm.get_n())
+    profile = atmosphere_profile(np.array(altitude_list) * 1000)
+    density = profile.density
+    temperature = profile.T
+    gravity = profile.g
+    pressure = profile.P
+    speed_of_sound = profile.SV
+    atomic_speed = profile.n
 
 
     fig, axes = plt.subplots(nrows=2, ncols=3, figsize=(10, 8))
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import numpy as np
+import atmosphere
+import path
+
+TABLE_VERSION = 1
+
+# Поля таблицы (последняя ось массива), как в atmosphere.AtmosphereArrays
+FIELDS = atmosphere.AtmosphereArrays._fields
+
+# Диапазон высот (м) и шаг сетки по умолчанию. Шаг должен делить высоты
+# разрывов модели (100 м, 5 и 80 км, 94 км), тогда разрывы попадают в узлы.
+ALTITUDE_RANGE = (0.0, 1200000.0)
+STEP = 50.0
+
+def table_key(altitude_range, step, dtype):
+    """Хеш версии, сетки и исходных таблиц модели атмосферы"""
+    source = [TABLE_VERSION, list(altitude_range), step, np.dtype(dtype).str,
+              atmosphere.HT, atmosphere.TT, atmosphere.TMM, atmosphere.dynH, atmosphere.dynT,
+              atmosphere.windH, atmosphere.windV,
+              [atmosphere.Mc, atmosphere.gc, atmosphere.nc, atmosphere.pc, atmosphere.Tc,
+               atmosphere.RB, atmosphere.r, atmosphere.R, atmosphere.H_LIMIT]]
+    return hashlib.sha1(json.dumps(source).encode()).hexdigest()[:16]
+
+class AtmosphereTable:
+    """
+    Параметры атмосферы на равномерной сетке высот с линейной интерполяцией.
+    data[i, 0] - значения в узле i, data[i, 1] - предел слева в узле i+1,
+    поэтому разрывы модели в узлах не размазываются на соседнюю ячейку.
+    Вне сетки значения считаются точно через atmosphere_profile.
+    """
+    def __init__(self, altitude_range, step, data):
+        self.altitude_range = altitude_range
+        self.step = step
+        # ndarray-представление без накладных расходов np.memmap при индексации
+        self.data = np.asarray(data)
+        self.dtype = data.dtype
+        self.key = table_key(altitude_range, step, self.dtype)
+        self._last = data.shape[0] - 1
+
+    @staticmethod
+    def nodes(altitude_range=ALTITUDE_RANGE, step=STEP):
+        count = int(round((altitude_range[1] - altitude_range[0]) / step)) + 1
+        return altitude_range[0] + step * np.arange(count, dtype=np.float64)
+
+    @classmethod
+    def build(cls, altitude_range=ALTITUDE_RANGE, step=STEP, dtype=np.float64):
+        H = cls.nodes(altitude_range, step)
+        at_nodes = np.column_stack(atmosphere.atmosphere_profile(H))
+        left = np.column_stack(atmosphere.atmosphere_profile(np.nextafter(H[1:], -np.inf)))
+
+        data = np.empty((len(H), 2, len(FIELDS)), dtype=dtype)
+        data[:, 0] = at_nodes
+        data[:-1, 1] = left
+        data[-1, 1] = at_nodes[-1]
+        return cls(altitude_range, step, data)
+
+    @classmethod
+    def load_or_build(cls, altitude_range=ALTITUDE_RANGE, step=STEP, dtype=np.float64, cache_dir=None):
+        """Таблица из кэша на диске (отображается в память) или построение и сохранение новой"""
+        cache_dir = path.cache_path if cache_dir is None else cache_dir
+        filename = os.path.join(cache_dir, "atmosphere_" + table_key(altitude_range, step, dtype) + ".npy")
+        if os.path.exists(filename):
+            return cls(altitude_range, step, np.load(filename, mmap_mode='r'))
+
+        table = cls.build(altitude_range, step, dtype)
+        table.save(filename)
+        return table
+
+    def save(self, filename):
+        # запись через временный файл: файл, отображенный в память другим процессом, не перезаписывается
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        temp = f"{filename}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            np.save(f, np.asarray(self.data))
+        os.replace(temp, filename)
+
+    def lookup(self, H):
+        """AtmosphereArrays из чисел в одной точке; nan там, где atmosphere дает None"""
+        u = (H - self.altitude_range[0]) / self.step
+        i = int(u)
+        if u < 0 or i > self._last:
+            return atmosphere.AtmosphereArrays(*(float(x) for x in atmosphere.atmosphere_profile(H)))
+        if i == self._last:
+            return atmosphere.AtmosphereArrays(*self.data[i, 0].tolist())
+        lo, hi = self.data[i].tolist()
+        w = u - i
+        return atmosphere.AtmosphereArrays(*[l + w * (h - l) for l, h in zip(lo, hi)])
+
+    def lookup_batch(self, H):
+        """Векторный lookup: AtmosphereArrays из массивов"""
+        H = np.asarray(H, dtype=np.float64)
+        u = (H - self.altitude_range[0]) / self.step
+        inside = (u >= 0) & (u <= self._last)
+        i = np.minimum(np.where(inside, u, 0).astype(np.intp), self._last)
+        w = (u - i)[..., np.newaxis].astype(self.dtype)
+
+        cell = self.data[i]
+        res = cell[..., 0, :] + w * (cell[..., 1, :] - cell[..., 0, :])
+        # в последнем узле w = 0, предел слева не участвует
+        if not inside.all():
+            exact = atmosphere.atmosphere_profile(H[~inside])
+            res[~inside] = np.column_stack(exact)
+        return atmosphere.AtmosphereArrays(*np.moveaxis(res, -1, 0))
+
+    def max_error(self, samples=20000, seed=0):
+        """
+        Максимальная ошибка интерполяции по полям на случайных высотах:
+        относительная, а там, где точное значение равно нулю, - абсолютная
+        """
+        rng = np.random.default_rng(seed)
+        H = rng.uniform(self.altitude_range[0], self.altitude_range[1], samples)
+        approx = self.lookup_batch(H)
+        exact = atmosphere.atmosphere_profile(H)
+        errors = {}
+        for name, a, b in zip(FIELDS, approx, exact):
+            defined = ~np.isnan(b)
+            a, b = a[defined], b[defined]
+            scale = np.where(b != 0, np.abs(b), 1.0)
+            rel = np.abs(a - b) / scale
+            errors[name] = float(np.max(rel)) if rel.size else 0.0
+        return errors
+
+_tables = {}
+
+def get_table(step=STEP, dtype=np.float64):
+    """Таблица по умолчанию из реестра, при первом обращении читается из кэша"""
+    key = (step, np.dtype(dtype).str)
+    table = _tables.get(key)
+    if table is None:
+        table = _tables[key] = AtmosphereTable.load_or_build(ALTITUDE_RANGE, step, dtype)
+    return table
+
+def lookup(H):
+    """Быстрый режим: параметры атмосферы на высоте H из таблицы по умолчанию"""
+    return get_table().lookup(H)
+
+if __name__ == "__main__":
+    import time
+
+    for dtype in (np.float64, np.float32):
+        table = get_table(dtype=dtype)
+        print(np.dtype(dtype).name, "table:", table.data.shape, f"{table.data.nbytes / 2**20:.1f} MB")
+        for name, err in table.max_error().items():
+            print(f"  {name:8s} max rel error {err:.2e}")
+
+    H = np.random.default_rng(1).uniform(0, 120000, 20000)
+    start = time.perf_counter()
+    for h in H:
+        atmosphere.atmosphere(float(h))
+    exact_time = time.perf_counter() - start
+
+    table = get_table()
+    start = time.perf_counter()
+    for h in H:
+        table.lookup(float(h))
+    table_time = time.perf_counter() - start
+    print(f"{len(H)} points: exact {exact_time:.3f} s, table {table_time:.3f} s")
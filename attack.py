@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 class alpha:
     def __init__(self, k1: float, k2: float, septime: float, IsRichOrbit: bool):
@@ -33,6 +34,31 @@ class alpha:
             # На пассивном участке - без ограничений (или мягкое ограничение)
             return min(35.0, ans)  # Можно добавить max(-90, min(90, ans)) если нужно
 
+def calculate_alpha_batch(k1, k2, septime, IsRichOrbit, velocity, time):
+    """
+    Векторный аналог alpha.calculate_alpha: k1, k2, velocity, time - числа
+    или массивы, согласованные по форме (например, по траекториям ансамбля)
+    """
+    k1 = np.asarray(k1, dtype=np.float64)
+    k2 = np.asarray(k2, dtype=np.float64)
+    velocity = np.asarray(velocity, dtype=np.float64)
+    time = np.asarray(time, dtype=np.float64)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = math.pi * (velocity - 50)
+        che = (velocity - 50) + 0.25 * (270 - velocity)
+        active = - k1 * np.sin(z / che) ** 2
+        if not IsRichOrbit:
+            passive = k2 * np.sqrt(np.maximum(time - septime, 0))
+        else:
+            z = math.pi * (time - septime)
+            che = (time - septime) + 0.25 * (septime + 60 - time)
+            passive = np.where(time - septime < 60, 90 * np.sin(z / che) ** 2, 0.0)
+
+    ans = np.where((50 < velocity) & (velocity < 270) & (time <= septime), active,
+                   np.where(time >= septime, passive, 0.0))
+    return np.where(time <= septime, np.maximum(-5.0, ans), np.minimum(35.0, ans))
+
 # Пример использования
 if __name__ == "__main__":
     a = alpha(1.0, 0.5, 100.0, True)
@@ -0,0 +1,1165 @@
+import rocket_parser as rp
+import constants
+import os
+import path
+import atmosphere as atmo
+import aerodynamics as aero
+import aero_grid
+import atmosphere_table
+import math
+from scipy.integrate import solve_ivp
+from scipy.optimize import minimize, differential_evolution, Bounds
+import attack
+import integrator
+import eval_cache
+import recorder
+import columnar
+import numpy as np
+import json
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+# Глобальные переменные для хранения лучших коэффициентов
+best_coefficients = None
+best_score = float('inf')
+best_simulation_data = None
+optimization_history = []
+target_achieved = False  # Флаг достижения цели
+
+rocket = "cz_2c"
+parser = rp.rocket_parser(path.rocket_lib + rocket + ".json")
+
+# Диапазоны коэффициентов согласно требованиям
+COEF1_RANGE = (0.1, 4.5)    # Первый коэффициент: 0.1 - 4.5
+COEF2_RANGE = (0.02, 2.0)   # Второй коэффициент: 0.01 - 0.5
+
+# Целевые параметры
+TARGET_VELOCITY = 7780
+TARGET_ALTITUDE_MIN = 198000
+TARGET_ALTITUDE_MAX = 210000
+TARGET_ANGLE_RANGE = 6
+TARGET_FINAL_ATTACK_MIN = 1  # Минимальный финальный угол атаки
+
+# Выше этой высоты аэродинамические силы не учитываются
+AERO_CEILING = 90000
+# Линия Кармана, м
+KARMAN_LINE = 100000
+
+# Интегрирование по сегментам между разрывами правой части (integrator.solve_segments):
+# узлы временной шкалы парсера, окончания работы ступеней, septime программы атаки
+# и пересечение AERO_CEILING; при False - одним интервалом с шагом не больше interstep
+INTEGRATION_EVENTS = True
+# Каждый узел шкалы - перезапуск RK45 (~7 вычислений правой части). При крупном шаге
+# шкалы это окупается (cz_2c, interstep 2 с: 1315 вычислений вместо 2438, и точнее),
+# при мелком - нет (electron, 0.1 с: 9023 вместо 7735, скачки массы малы). Узлы шкалы
+# с interstep меньше этого порога не разрывают интервал, шаг и так не больше interstep
+SEGMENT_MIN_INTERSTEP = 0.5
+# Допуски адаптивного интегратора (RK45)
+RTOL = 1e-6
+ATOL = 1e-8
+
+# Режим глобального поиска differential_evolution: 'ensemble' - поколение одним
+# ансамблем траекторий, 'parallel' - члены поколения в пуле из OPTIMIZATION_WORKERS
+# процессов (None - по числу ядер), 'serial' - последовательно
+OPTIMIZATION_MODE = 'ensemble'
+OPTIMIZATION_WORKERS = None
+# Меньшие наборы точек считаются последовательно (ансамбль дороже нескольких траекторий)
+ENSEMBLE_MIN_SIZE = 4
+
+# Начальное состояние и ограничение угла атаки (градусы) для расчетов при оптимизации
+OPTIMIZATION_Y0 = [0, math.pi/2, 1.0, 1.0, 0.1]
+OPTIMIZATION_ATTACK_LIMIT = 30
+# Начальное состояние номинальной траектории (финальный баллистический расчет, fleet)
+NOMINAL_Y0 = [0, math.pi/2, 10.0, 100.0, 0.1]
+
+# Постоянный кэш расчетов при оптимизации (eval_cache, cache/evaluations.jsonl):
+# коэффициенты, уже считанные с теми же ракетой и интегратором, не пересчитываются
+EVAL_CACHE = True
+# Версия модели в ключе кэша: увеличивается при любом изменении расчета
+# (правая часть, аэродинамика, интегратор), не отраженном в настройках ключа
+MODEL_VERSION = 2
+EVAL_CACHE_DIGITS = eval_cache.DIGITS
+
+# Запись траектории (recorder): шаг по времени (с) и предельный объем буферов (байт);
+# углы в градусах, Cbs..Csb - динамические коэффициенты для dynamics.py
+RECORD_STEP = recorder.STEP
+RECORD_MAX_BYTES = recorder.MAX_BYTES
+TELEMETRY_FIELDS = ('time', 'attack', 'velocity', 'trajectory', 'altitude', 'wind',
+                    'Cbs', 'Cyw', 'Cww', 'Cyy', 'Cwy', 'Cwb', 'Csb')
+
+# Поля файла динамических коэффициентов (колоночный формат columnar, output/*.traj)
+# и копия в CSV для просмотра
+OUTPUT_FIELDS = ('time', 'wind', 'Cbs', 'Cyw', 'Cww', 'Cyy', 'Cwy', 'Cwb', 'Csb')
+OUTPUT_CSV = True
+
+# Интегратор траектории по умолчанию: 'RK45' (integrator.rk45, совпадает с solve_ivp),
+# 'RK4' (постоянный шаг parser.interstep) или 'solve_ivp'
+INTEGRATOR = 'RK45'
+
+def fall_event(t, y):
+    """Событие падения: высота проходит через ноль сверху вниз"""
+    return y[3]
+
+fall_event.terminal = True
+fall_event.direction = -1
+
+def aero_ceiling_event(t, y):
+    """Пересечение AERO_CEILING: аэродинамические силы включаются или выключаются"""
+    return y[3] - AERO_CEILING
+
+aero_ceiling_event.restart = True
+
+def karman_event(t, y):
+    """Пересечение линии Кармана"""
+    return y[3] - KARMAN_LINE
+
+def fall_event_batch(t, Y):
+    """Событие падения для ансамбля: высоты всех траекторий"""
+    return Y[:, 3]
+
+fall_event_batch.direction = -1
+
+def build_stream(parser):
+    """Геометрия UnionStream ракеты"""
+    G = aero.UnionStream()
+    G.set_elnumber(parser.get_block_number()+1)
+    G.set_diameter(parser.get_diameters())
+    G.set_length(parser.get_part_length())
+    return G
+
+class Trajectory:
+    """
+    Баллистический расчет одной ракеты. Геометрия UnionStream, парсер и
+    программа угла атаки готовятся один раз; правая часть system только
+    читает состояние ракеты из временного ряда парсера и считает атмосферу
+    один раз на вызов, без построения геометрии и вспомогательных объектов.
+    """
+    def __init__(self, parser, coefs=None, attack_limit=None):
+        self.parser = parser
+        self.G = build_stream(parser)
+
+        self.area = parser.maximum_area
+        self.length = parser.rocket_length
+        self.thrust_ratio = parser.thrust_ratio
+        self.recorder = recorder.Recorder(TELEMETRY_FIELDS, RECORD_STEP, RECORD_MAX_BYTES)
+        # углы атаки (градусы) по всем вызовам правой части
+        self.attack_history = []
+        self.set_program(parser.attack_coefs if coefs is None else coefs, attack_limit)
+
+    def set_program(self, coefs, attack_limit=None):
+        """Программа угла атаки; attack_limit - ограничение модуля угла (градусы)"""
+        self.coefs = coefs
+        self.alpha = attack.alpha(coefs[0], coefs[1], self.parser.work_time[0], False)
+        self.attack_limit = attack_limit
+
+    def get_attack(self, vel, time):
+        alpha_val = self.alpha.calculate_alpha(vel, time)
+        if self.attack_limit is not None:
+            return max(-self.attack_limit, min(self.attack_limit, alpha_val))
+        return alpha_val
+
+    def aero(self, vel, alt, attack_angle, atm):
+        """(CX, CY, положение фокуса) из сетки G.aero_grid или точным расчетом по готовой атмосфере"""
+        if self.G.aero_grid is not None:
+            CX, CY, E, focus_position = self.G.aero_grid.lookup(vel, alt, attack_angle)
+            return CX, CY, focus_position
+        res = self.G.evaluate(vel, alt, attack_angle, atm)
+        return res.CX, res.CY, res.focus_position
+
+    def system(self, t, vars, history=True):
+        """Система дифференциальных уравнений; history=False - без записи угла атаки в attack_history"""
+        # состояние приходит массивом numpy, арифметика на float быстрее, чем на скалярах numpy
+        n, Y, vel, alt, l = vars.tolist()
+        state = self.parser.state_at(t)
+        mass = state.mass
+
+        attack_deg = self.get_attack(vel, t)
+        if history:
+            self.attack_history.append(attack_deg)
+        attack_angle = attack_deg * math.pi/180
+
+        atm = atmo.atmosphere(alt)
+        g = atm.g
+        if alt > AERO_CEILING:
+            CX = CY = dypressure = 0
+            focus_position = 0.0
+        else:
+            CX, CY, focus_position = self.aero(vel, alt, attack_angle, atm)
+            dypressure = atm.po * vel**2/2
+        if alt < 0:
+            alt = 0
+
+        sinY = math.sin(Y)
+        cosY = math.cos(Y)
+        radius = constants.earth_radius + alt
+        F_G = g * cosY * (1 - vel**2 / (g * radius))
+        return [
+            (vel/radius)*cosY,
+            (state.thrust * math.sin(attack_angle) + CY * dypressure * self.area)/(mass*vel) - F_G/vel,
+            (state.thrust * math.cos(attack_angle) - CX * dypressure * self.area)/mass - g * sinY,
+            vel * sinY,
+            vel * cosY
+        ]
+
+    def max_q_event(self, t, vars):
+        """
+        Событие максимального скоростного напора q = po * v^2/2: dq/dt = 0 при
+        убывании; выше AERO_CEILING максимумы не ищутся (значение условно 1)
+        """
+        n, Y, vel, alt, l = vars.tolist()
+        if alt > AERO_CEILING:
+            return 1.0
+        density = atmo.atmosphere(alt).po
+        density_slope = (atmo.atmosphere(alt + 1).po - atmo.atmosphere(alt - 1).po) / 2
+        acceleration = self.system(t, vars, history=False)[2]
+        return vel**2/2 * density_slope * vel * math.sin(Y) + density * vel * acceleration
+
+    max_q_event.direction = -1
+
+    def breakpoints(self):
+        """
+        Разрывы правой части по времени: узлы временной шкалы парсера (масса и
+        тяга между ними постоянны; при interstep не меньше SEGMENT_MIN_INTERSTEP),
+        окончания работы ступеней и septime
+        """
+        times = list(self.parser.stage_end) + [self.parser.work_time[0]]
+        if not self.parser.analytic and self.parser.interstep >= SEGMENT_MIN_INTERSTEP:
+            times.extend(self.parser.time_vector.tolist())
+            times.append(self.parser.time_vector.item(-1) + self.parser.interstep)
+        return times
+
+    def telemetry(self, t, vars):
+        """Параметры и динамические коэффициенты в точке (t, vars) в порядке TELEMETRY_FIELDS"""
+        n, Y, vel, alt, l = vars.tolist()
+        state = self.parser.state_at(t)
+        mass = state.mass
+        inertia = state.inertia
+
+        attack_deg = self.get_attack(vel, t)
+        atm = atmo.atmosphere(alt)
+        if alt > AERO_CEILING:
+            lift = 0
+            focus_position = 0.0
+        else:
+            CX, CY, focus_position = self.aero(vel, alt, attack_deg * math.pi/180, atm)
+            lift = CY * atm.po * vel**2/2 * self.area
+
+        thrust = state.thrust * self.thrust_ratio
+        first_point = abs(focus_position - state.center)
+        second_point = abs(self.length - state.center)
+        return (t, attack_deg, vel, Y*180/math.pi, max(alt, 0), atm.wind_velocity,
+                thrust/mass,
+                -(state.thrust+lift)/mass,
+                (-lift*first_point)/inertia,
+                lift/(mass*vel),
+                (lift*first_point)/inertia/vel,
+                thrust*second_point/inertia,
+                thrust/inertia)
+
+    def run(self, y0, coefs=None, attack_limit=None, record=False, method=None, sink=None, flight_events=None):
+        """
+        Интегрирование от старта до min(время работы - 1, 800) с. При record=True
+        решение с шагом RECORD_STEP записывается в self.recorder (по dense output),
+        с sink (columnar.ColumnWriter) - еще и кусками в файл без ограничения длины.
+        method - 'RK45' или 'RK4' из integrator либо 'solve_ivp' (по умолчанию INTEGRATOR).
+        При INTEGRATION_EVENTS в sol.event_times и sol.event_states - времена и
+        состояния событий по именам; max_q и karman ищутся при flight_events
+        (по умолчанию вместе с record).
+        """
+        if coefs is not None:
+            self.set_program(coefs, attack_limit)
+        method = INTEGRATOR if method is None else method
+        self.attack_history = []
+        t_span = (0, min(self.parser.get_full_time()-1, 800))
+        events = [fall_event]
+        if INTEGRATION_EVENTS:
+            events.append(aero_ceiling_event)
+            if record if flight_events is None else flight_events:
+                events += [karman_event, self.max_q_event]
+        # в сегменте RK45 начинает с шага на весь сегмент (integrator.segment_step)
+        max_step = self.parser.interstep
+        first_step = lambda span: integrator.segment_step(span, max_step) if INTEGRATION_EVENTS else None
+        if method == 'solve_ivp':
+            solver = lambda f, span, y, ev, dense: solve_ivp(f, span, y, method='RK45', max_step=max_step, events=ev,
+                                                             rtol=RTOL, atol=ATOL, dense_output=dense,
+                                                             first_step=first_step(span))
+        else:
+            solver = lambda f, span, y, ev, dense: integrator.solve(f, span, y, method, max_step=max_step, events=ev,
+                                                                    rtol=RTOL, atol=ATOL, dense_output=dense,
+                                                                    first_step=first_step(span))
+
+        if INTEGRATION_EVENTS:
+            sol = integrator.solve_segments(solver, self.system, t_span, y0, self.breakpoints(), events, record)
+            sol.event_times = self.event_times(sol, events)
+            sol.event_states = {name: sol.y_events[k] for k, name in enumerate(self.event_names(events))}
+        else:
+            sol = solver(self.system, t_span, y0, events, record)
+        if record:
+            self.recorder.reset()
+            if sol.sol is not None:
+                self.recorder.sample(sol, self.telemetry, sink)
+        return sol
+
+    def event_names(self, events):
+        names = {fall_event: 'fall', aero_ceiling_event: 'aero_ceiling', karman_event: 'karman',
+                 self.max_q_event: 'max_q'}
+        return [names[event] for event in events]
+
+    def event_times(self, sol, events):
+        """Времена событий по именам: события интегрирования и разрывы по времени до конца расчета"""
+        times = {name: sol.t_events[k] for k, name in enumerate(self.event_names(events))}
+        stage_end = np.asarray(self.parser.stage_end[:-1], dtype=np.float64)
+        times['stage_separation'] = stage_end[stage_end <= sol.t[-1]]
+        septime = self.parser.work_time[0]
+        times['septime'] = np.array([septime] if septime <= sol.t[-1] else [])
+        return times
+
+class Ensemble:
+    """
+    Ансамбль траекторий одной ракеты с разными программами угла атаки:
+    состояния хранятся матрицей N x 5 и интегрируются синхронно
+    (integrator.rk4_ensemble), правая часть считается сразу для всех
+    активных траекторий. Атмосфера берется из atmosphere_table, аэродинамика -
+    из сетки aero_grid; масса и тяга общие, так как время у всех одно.
+    """
+    def __init__(self, parser, grid=None):
+        self.parser = parser
+        self.G = build_stream(parser)
+        self.grid = aero_grid.AeroGrid.load_or_build(self.G) if grid is None else grid
+        self.atm_table = atmosphere_table.get_table()
+        # версии приближенной модели для ключа кэша расчетов
+        self.key = {'grid': self.grid.key, 'atmosphere': self.atm_table.key}
+        self.area = parser.maximum_area
+        self.septime = parser.work_time[0]
+        self.k1 = self.k2 = None
+        self.attack_limit = None
+        # наибольший и последний угол атаки (градусы) по вызовам правой части
+        self.max_attack = None
+        self.final_attack = None
+
+    def system(self, t, Y, rows):
+        """Правая часть для строк rows ансамбля"""
+        N, Yang, vel, alt, L = Y.T
+        state = self.parser.state_at(t)
+
+        attack_deg = attack.calculate_alpha_batch(self.k1[rows], self.k2[rows], self.septime, False, vel, t)
+        if self.attack_limit is not None:
+            attack_deg = np.clip(attack_deg, -self.attack_limit, self.attack_limit)
+        self.max_attack[rows] = np.maximum(self.max_attack[rows], attack_deg)
+        self.final_attack[rows] = attack_deg
+        attack_angle = attack_deg * math.pi/180
+
+        atm = self.atm_table.lookup_batch(alt)
+        g = atm.g
+        # выше AERO_CEILING сетка берет значения с верхней границы, но скоростной напор нулевой
+        CX, CY, _, _ = self.grid.lookup_batch(vel, alt, attack_angle, clamp=True)
+        dypressure = np.where(alt <= AERO_CEILING, atm.density * vel**2/2, 0)
+        alt = np.maximum(alt, 0)
+
+        sinY = np.sin(Yang)
+        cosY = np.cos(Yang)
+        radius = constants.earth_radius + alt
+        F_G = g * cosY * (1 - vel**2 / (g * radius))
+        return np.column_stack((
+            (vel/radius)*cosY,
+            (state.thrust * np.sin(attack_angle) + CY * dypressure * self.area)/(state.mass*vel) - F_G/vel,
+            (state.thrust * np.cos(attack_angle) - CX * dypressure * self.area)/state.mass - g * sinY,
+            vel * sinY,
+            vel * cosY
+        ))
+
+    def run(self, y0, coefs, attack_limit=None, step=None):
+        """
+        Траектории для матрицы коэффициентов coefs (N x 2) из общего начального
+        состояния y0; шаг по умолчанию - parser.interstep
+        """
+        coefs = np.asarray(coefs, dtype=np.float64).reshape(-1, 2)
+        self.k1, self.k2 = coefs[:, 0], coefs[:, 1]
+        self.attack_limit = attack_limit
+        self.max_attack = np.full(len(coefs), -np.inf)
+        self.final_attack = np.zeros(len(coefs))
+        t_span = (0, min(self.parser.get_full_time()-1, 800))
+        Y0 = np.tile(np.asarray(y0, dtype=np.float64), (len(coefs), 1))
+        return integrator.rk4_ensemble(self.system, t_span, Y0, self.parser.interstep if step is None else step,
+                                       event=fall_event_batch)
+
+# Расчетчик для выбранной ракеты, строится один раз; ансамбль - при первой оптимизации
+engine = Trajectory(parser)
+ensemble = None
+# Запись последнего расчета с record=True (графики, output)
+telemetry = engine.recorder
+
+def check_target_achieved(final_velocity, final_altitude, final_angle, final_attack):
+    """Проверяет, достигнуты ли целевые параметры"""
+    velocity_ok = final_velocity >= TARGET_VELOCITY
+    altitude_ok = TARGET_ALTITUDE_MIN <= final_altitude <= TARGET_ALTITUDE_MAX
+    angle_ok = abs(final_angle) <= TARGET_ANGLE_RANGE
+    attack_ok = abs(final_attack) >= TARGET_FINAL_ATTACK_MIN
+    
+    return velocity_ok and altitude_ok and angle_ok and attack_ok
+
+def update_rocket_json(new_coefficients):
+    """Обновляет коэффициенты в JSON файле ракеты"""
+    json_path = path.rocket_lib + rocket + ".json"
+    
+    try:
+        with open(json_path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        
+        data["attack_coefs"] = new_coefficients
+               
+        with open(json_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, indent=2, ensure_ascii=False)
+        
+        print(f"✅ Коэффициенты успешно обновлены в файле: {json_path}")
+        print(f"✅ Новые коэффициенты: {new_coefficients}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Ошибка при обновлении JSON файла: {e}")
+        return False
+
+def objective_score(coefs, final_params):
+    """
+    Score по конечным параметрам траектории (final_params как в
+    run_simulation_and_evaluate_detailed): 0 при достижении цели, 1000 для
+    неудачной симуляции. Глобальное состояние не используется.
+    """
+    if not final_params:
+        return 1000.0
+    final_velocity, final_altitude, final_angle, max_attack, final_attack = final_params
+    if check_target_achieved(final_velocity, final_altitude, final_angle, final_attack):
+        return 0
+
+    # Целевые параметры
+    target_velocity = TARGET_VELOCITY
+    target_altitude = 200000
+    target_angle = 0
+
+    # Базовые ошибки (нормализованные)
+    # ОШИБКА СКОРОСТИ: строгий штраф за скорости ниже целевой, НО НЕТ ШТРАФА за скорости выше целевой
+    if final_velocity < target_velocity:
+        velocity_error = (target_velocity - final_velocity) / target_velocity
+    else:
+        velocity_error = 0  # Нет ошибки если скорость выше целевой
+
+    # ОШИБКА ВЫСОТЫ: штраф за отклонение от целевого диапазона
+    if final_altitude < TARGET_ALTITUDE_MIN:
+        altitude_error = (TARGET_ALTITUDE_MIN - final_altitude) / TARGET_ALTITUDE_MIN
+    elif final_altitude > TARGET_ALTITUDE_MAX:
+        altitude_error = (final_altitude - TARGET_ALTITUDE_MAX) / TARGET_ALTITUDE_MAX
+    else:
+        altitude_error = 0
+
+    # Ошибка угла траектории
+    angle_error = min(abs(final_angle - target_angle), abs(final_angle - target_angle + 360)) / 180
+
+    # ОШИБКА ПО ФИНАЛЬНОМУ УГЛУ АТАКИ: 
+    # - Штраф за углы меньше минимального
+    # - НУЛЕВАЯ ошибка для углов >= минимального
+    if abs(final_attack) < TARGET_FINAL_ATTACK_MIN:
+        attack_error = (TARGET_FINAL_ATTACK_MIN - abs(final_attack)) / TARGET_FINAL_ATTACK_MIN
+    else:
+        attack_error = 0  # Нет ошибки если достигнут минимум
+
+    # Умные веса в зависимости от прогресса
+    base_score = velocity_error + 2.0 * altitude_error + 1.5 * angle_error + 0.8 * attack_error
+
+    # Дополнительные штрафы
+    penalties = 0
+
+    # Штраф за превышение высоты (очень строгий)
+    if final_altitude > target_altitude + 50000:  # >250 км
+        penalties += 5.0 * ((final_altitude - target_altitude) / target_altitude)
+
+    # Штраф за слишком большой угол (строгий)
+    if abs(final_angle) > 45:  # Слишком вертикальный полет
+        penalties += 3.0 * (abs(final_angle) / 90)
+
+    # Штраф за слишком маленькую скорость (очень строгий)
+    if final_velocity < 5000:
+        penalties += 20.0
+
+    # Штраф за слишком большую атаку (но менее строгий, так как хотим большую финальную атаку)
+    if abs(max_attack) > 30:
+        penalties += 1.0 * (abs(max_attack) / 30)
+
+    # Штраф за падение
+    if final_altitude < 0:
+        penalties += 100.0
+
+    # Штраф за выход за границы коэффициентов
+    if not (COEF1_RANGE[0] <= coefs[0] <= COEF1_RANGE[1]):
+        penalties += 50.0
+    if not (COEF2_RANGE[0] <= coefs[1] <= COEF2_RANGE[1]):
+        penalties += 50.0
+
+    total_score = base_score + penalties
+    return total_score
+
+def score_simulation(coefs, final_params, simulation_data, approximate=False):
+    """
+    Score результата симуляции; обновляет лучший результат и флаг достижения цели.
+    approximate=True - final_params приближенной модели (ансамбль): score только
+    ранжирует кандидатов, а цель и лучший результат принимаются по повторному
+    точному расчету engine
+    """
+    global best_score, best_coefficients, best_simulation_data, target_achieved
+    
+    if approximate:
+        if not final_params:
+            return 1000.0
+        total_score = objective_score(coefs, final_params)
+        if total_score < best_score:
+            _, exact_params, exact_data = run_simulation_and_evaluate_detailed(coefs)
+            score_simulation(coefs, exact_params, exact_data)
+        return total_score
+
+    if final_params:
+        final_velocity, final_altitude, final_angle, max_attack, final_attack = final_params
+
+        # Проверяем, достигнута ли цель
+        if check_target_achieved(final_velocity, final_altitude, final_angle, final_attack):
+            target_achieved = True
+            best_score = 0
+            best_coefficients = coefs.copy()
+            best_simulation_data = simulation_data
+
+            print(f"\n🎯 ЦЕЛЕВЫЕ ПАРАМЕТРЫ ДОСТИГНУТЫ!")
+            print(f"Коэффициенты: {coefs}")
+            print(f"Скорость: {final_velocity:.1f} м/с")
+            print(f"Высота: {final_altitude/1000:.1f} км")
+            print(f"Угол траектории: {final_angle:.1f}°")
+            print(f"Финальный угол атаки: {final_attack:.1f}°")
+
+            # Немедленно обновляем JSON файл
+            update_rocket_json(coefs.tolist() if hasattr(coefs, 'tolist') else coefs)
+
+            return 0  # Идеальный score
+
+        total_score = objective_score(coefs, final_params)
+
+        # Сохраняем лучший результат
+        if total_score < best_score:
+            best_score = total_score
+            best_coefficients = coefs.copy()
+            best_simulation_data = simulation_data
+
+            # Записываем в историю
+            optimization_history.append({
+                'coefs': coefs.copy(),
+                'score': total_score,
+                'velocity': final_velocity,
+                'altitude': final_altitude,
+                'angle': final_angle,
+                'max_attack': max_attack,
+                'final_attack': final_attack
+            })
+
+            print(f"🎯 УЛУЧШЕНИЕ: coefs={coefs}, v={final_velocity:.1f} м/с, "
+                  f"h={final_altitude/1000:.1f} км, angle={final_angle:.1f}°, "
+                  f"final_α={final_attack:.1f}°, score={total_score:.4f}")
+
+        return total_score
+    else:
+        return 1000.0  # Большой штраф за неудачную симуляцию
+
+def improved_objective_function(coefs):
+    """Улучшенная функция стоимости с проверкой достижения цели и требованием к финальному углу атаки"""
+    global best_score, best_coefficients, best_simulation_data, target_achieved
+    
+    # Если цель уже достигнута, возвращаем наилучший score
+    if target_achieved:
+        return best_score
+    
+    # Проверка границ коэффициентов
+    if not (COEF1_RANGE[0] <= coefs[0] <= COEF1_RANGE[1] and 
+            COEF2_RANGE[0] <= coefs[1] <= COEF2_RANGE[1]):
+        return 1000.0
+    
+    try:
+        # Запускаем симуляцию
+        score, final_params, simulation_data = run_simulation_and_evaluate_detailed(coefs)
+        return score_simulation(coefs, final_params, simulation_data)
+            
+    except Exception as e:
+        print(f"❌ Ошибка в функции стоимости: {e}")
+        return 1000.0
+
+def improved_objective_batch(population):
+    """
+    Функция стоимости для differential_evolution(vectorized=True): population - 2 x S,
+    все S траекторий считаются одним ансамблем
+    """
+    coefs = np.asarray(population, dtype=np.float64).T
+    if len(coefs) < ENSEMBLE_MIN_SIZE:
+        # уточнение (polish) вызывает функцию по одной точке - последовательный расчет дешевле
+        return np.array([improved_objective_function(c) for c in coefs])
+    scores = np.full(len(coefs), 1000.0)
+    if target_achieved:
+        scores[:] = best_score
+        return scores
+
+    inside = ((COEF1_RANGE[0] <= coefs[:, 0]) & (coefs[:, 0] <= COEF1_RANGE[1]) &
+              (COEF2_RANGE[0] <= coefs[:, 1]) & (coefs[:, 1] <= COEF2_RANGE[1]))
+    index = np.flatnonzero(inside)
+    model = get_ensemble().key
+    keys = [evaluation_key(rocket, coefs[i], "RK4-ensemble", model) for i in index]
+    results = [load_evaluation(key) for key in keys]
+    missing = [k for k, final_params in enumerate(results) if final_params is None]
+    if missing:
+        try:
+            computed = run_simulation_batch(coefs[index[missing]])
+        except Exception as e:
+            print(f"❌ Ошибка в функции стоимости: {e}")
+            return scores
+        for k, final_params in zip(missing, computed):
+            store_evaluation(keys[k], final_params)
+            results[k] = final_params
+
+    for i, final_params in zip(index, results):
+        # как в последовательном режиме: после достижения цели остальные получают лучший score
+        scores[i] = best_score if target_achieved else score_simulation(coefs[i], final_params, None, approximate=True)
+    return scores
+
+def run_simulation_and_evaluate_detailed(coefs, record=False):
+    """
+    Запускает симуляцию и возвращает детальные результаты; при попадании в
+    кэш расчетов данные траектории (simulation_data) не возвращаются
+    """
+    # запись данных для графиков требует самого расчета
+    key = None if record else evaluation_key(rocket, coefs, INTEGRATOR)
+    cached = load_evaluation(key)
+    if cached is not None:
+        return (0, cached, None) if cached else (1000.0, None, None)
+
+    try:
+        # Атака ограничена 30° для больших финальных значений, улучшенные начальные условия
+        sol = engine.run(OPTIMIZATION_Y0, coefs, attack_limit=OPTIMIZATION_ATTACK_LIMIT, record=record)
+        temp_attack_list = engine.attack_history
+        
+        final_params = final_parameters(sol, temp_attack_list)
+        store_evaluation(key, final_params)
+        if final_params:
+            simulation_data = {
+                'time': sol.t,
+                'velocity': sol.y[2],
+                'altitude': sol.y[3],
+                'angle': sol.y[1] * 180/math.pi,
+                'attack': temp_attack_list
+            }
+            
+            return 0, final_params, simulation_data
+        else:
+            return 1000.0, None, None
+            
+    except Exception as e:
+        print(f"❌ Ошибка в симуляции: {e}")
+        return 1000.0, None, None
+
+def final_parameters(sol, attack_history):
+    """(скорость, высота, угол траектории, макс. атака, финальная атака) в конце траектории или None"""
+    if not sol.success or len(sol.y[2]) == 0:
+        return None
+    final_velocity = sol.y[2][-1]
+    final_altitude = sol.y[3][-1]
+    final_angle = sol.y[1][-1] * 180/math.pi
+    max_attack = max(attack_history) if attack_history else 0
+    final_attack = attack_history[-1] if attack_history else 0
+    return final_velocity, final_altitude, final_angle, max_attack, final_attack
+
+# Кэш расчетов и хеши JSON ракет открываются при первом обращении
+_eval_cache = None
+_rocket_hashes = {}
+
+def get_eval_cache():
+    global _eval_cache
+    if _eval_cache is None:
+        _eval_cache = eval_cache.EvalCache(os.path.join(path.cache_path, "evaluations.jsonl"), EVAL_CACHE_DIGITS)
+    return _eval_cache
+
+def evaluation_key(rocket_name, coefs, method, model=None):
+    """
+    Ключ кэша расчетов для ракеты, коэффициентов и интегратора method;
+    model - версии таблиц приближенной модели (Ensemble.key). None - кэш выключен
+    """
+    if not EVAL_CACHE:
+        return None
+    rocket_hash = _rocket_hashes.get(rocket_name)
+    if rocket_hash is None:
+        rocket_hash = _rocket_hashes[rocket_name] = eval_cache.file_hash(path.rocket_lib + rocket_name + ".json")
+    settings = {
+        'method': method,
+        'step': get_engine(rocket_name).parser.interstep,
+        'y0': OPTIMIZATION_Y0,
+        'attack_limit': OPTIMIZATION_ATTACK_LIMIT,
+        'aero_ceiling': AERO_CEILING,
+        'segments': INTEGRATION_EVENTS,
+        'rtol': RTOL,
+        'atol': ATOL,
+        'parser': rp.PARSER_VERSION,
+        'model': MODEL_VERSION,
+    }
+    if model is not None:
+        settings.update(model)
+    return get_eval_cache().key(rocket_hash, coefs, settings)
+
+def load_evaluation(key):
+    """final_params из кэша ((), если симуляция не удалась) или None при промахе"""
+    if key is None:
+        return None
+    value = get_eval_cache().get(key)
+    if value is None:
+        return None
+    return tuple(value['final_params'] or ())
+
+def store_evaluation(key, final_params):
+    if key is not None:
+        get_eval_cache().put(key, {'final_params': None if final_params is None else [float(p) for p in final_params]})
+
+# Расчетчики других ракет по имени (в каждом процессе свои)
+_engines = {}
+
+def get_engine(rocket_name):
+    """Trajectory для ракеты из rocket_lib; для выбранной ракеты - engine"""
+    if rocket_name == rocket:
+        return engine
+    trajectory = _engines.get(rocket_name)
+    if trajectory is None:
+        trajectory = _engines[rocket_name] = Trajectory(rp.rocket_parser(path.rocket_lib + rocket_name + ".json"))
+    return trajectory
+
+def evaluate_coefficients(rocket_name, coefs):
+    """
+    Функция стоимости без глобального состояния: (score, final_params) для
+    ракеты rocket_name и коэффициентов coefs. Подходит для пула процессов.
+    """
+    if not (COEF1_RANGE[0] <= coefs[0] <= COEF1_RANGE[1] and
+            COEF2_RANGE[0] <= coefs[1] <= COEF2_RANGE[1]):
+        return 1000.0, None
+    trajectory = get_engine(rocket_name)
+    try:
+        sol = trajectory.run(OPTIMIZATION_Y0, coefs, attack_limit=OPTIMIZATION_ATTACK_LIMIT)
+    except Exception as e:
+        print(f"❌ Ошибка в симуляции: {e}")
+        return 1000.0, None
+    final_params = final_parameters(sol, trajectory.attack_history)
+    return objective_score(coefs, final_params), final_params
+
+class ParallelObjective:
+    """
+    Функция стоимости для differential_evolution(vectorized=True): члены
+    поколения считаются evaluate_coefficients в пуле процессов, лучший
+    результат и достижение цели учитываются в родительском процессе
+    """
+    def __init__(self, rocket_name, workers=None):
+        self.rocket_name = rocket_name
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def __call__(self, population):
+        coefs = np.asarray(population, dtype=np.float64).T
+        if target_achieved:
+            return np.full(len(coefs), best_score)
+
+        # кэш расчетов ведет родительский процесс, в пул уходят только промахи
+        keys = [evaluation_key(self.rocket_name, c, INTEGRATOR) for c in coefs]
+        results = [load_evaluation(key) for key in keys]
+        missing = [i for i, final_params in enumerate(results) if final_params is None]
+        chunksize = max(1, len(missing) // (4 * self.workers))
+        computed = self.pool.map(evaluate_coefficients, [self.rocket_name] * len(missing), coefs[missing], chunksize=chunksize)
+        for i, (score, final_params) in zip(missing, computed):
+            store_evaluation(keys[i], final_params)
+            results[i] = final_params
+
+        scores = np.empty(len(coefs))
+        for i, final_params in enumerate(results):
+            scores[i] = best_score if target_achieved else score_simulation(coefs[i], final_params or None, None)
+        return scores
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def get_ensemble():
+    """Ансамбль выбранной ракеты, строится при первом обращении"""
+    global ensemble
+    if ensemble is None:
+        ensemble = Ensemble(parser)
+    return ensemble
+
+def run_simulation_batch(coefs):
+    """
+    Ансамблевый аналог run_simulation_and_evaluate_detailed для матрицы
+    коэффициентов N x 2: список final_params по траекториям
+    """
+    ensemble = get_ensemble()
+    sol = ensemble.run(OPTIMIZATION_Y0, coefs, attack_limit=OPTIMIZATION_ATTACK_LIMIT)
+    return [(sol.y[i, 2], sol.y[i, 3], sol.y[i, 1] * 180/math.pi, ensemble.max_attack[i], ensemble.final_attack[i])
+            for i in range(len(sol.t))]
+
+def check_current_coefficients():
+    """Проверяет, обеспечивают ли текущие коэффициенты целевые параметры"""
+    print("Проверка текущих коэффициентов из парсера...")
+    print(f"Текущие коэффициенты: {parser.attack_coefs}")
+    
+    # Записываем данные этого расчета: если оптимизация не понадобится, они пойдут на графики
+    score, final_params, _ = run_simulation_and_evaluate_detailed(parser.attack_coefs, record=True)
+    
+    if final_params:
+        final_velocity, final_altitude, final_angle, max_attack, final_attack = final_params
+        
+        velocity_ok = final_velocity >= TARGET_VELOCITY
+        altitude_ok = TARGET_ALTITUDE_MIN <= final_altitude <= TARGET_ALTITUDE_MAX
+        angle_ok = abs(final_angle) <= TARGET_ANGLE_RANGE
+        attack_ok = abs(final_attack) >= TARGET_FINAL_ATTACK_MIN
+        
+        print(f"\nПроверка целевых параметров с коэффициентами {parser.attack_coefs}:")
+        print(f"Скорость: {final_velocity:.1f} м/с {'✅' if velocity_ok else '❌'}")
+        print(f"Высота: {final_altitude/1000:.1f} км {'✅' if altitude_ok else '❌'}")
+        print(f"Угол траектории: {final_angle:.1f}° {'✅' if angle_ok else '❌'}")
+        print(f"Финальный угол атаки: {final_attack:.1f}° {'✅' if attack_ok else '❌'}")
+        print(f"Макс. атака: {max_attack:.1f}°")
+        
+        # Проверка границ коэффициентов
+        coefs_in_range = (COEF1_RANGE[0] <= parser.attack_coefs[0] <= COEF1_RANGE[1] and 
+                         COEF2_RANGE[0] <= parser.attack_coefs[1] <= COEF2_RANGE[1])
+        print(f"Коэффициенты в допустимом диапазоне: {'✅' if coefs_in_range else '❌'}")
+        
+        if velocity_ok and altitude_ok and angle_ok and attack_ok and coefs_in_range:
+            print("\n✅ Текущие коэффициенты УЖЕ обеспечивают целевые параметры!")
+            global target_achieved, best_coefficients, best_score
+            target_achieved = True
+            best_coefficients = parser.attack_coefs
+            best_score = 0
+            return True, parser.attack_coefs
+        else:
+            print("\n❌ Текущие коэффициенты НЕ обеспечивают целевые параметры.")
+            return False, parser.attack_coefs
+    else:
+        print("❌ Ошибка при проверке текущих коэффициентов.")
+        return False, parser.attack_coefs
+
+def multi_stage_optimization():
+    """Многостадийная оптимизация с возможностью ранней остановки"""
+    global best_score, best_coefficients, target_achieved
+    
+    print("\n" + "=" * 60)
+    print("🚀 ЗАПУСК МНОГОСТАДИЙНОЙ ОПТИМИЗАЦИИ...")
+    print("=" * 60)
+    print(f"Диапазон коэффициентов: coef1={COEF1_RANGE}, coef2={COEF2_RANGE}")
+    
+    # Стадия 1: Глобальный поиск
+    print("\n--- СТАДИЯ 1: Глобальный поиск (differential_evolution) ---")
+    bounds = Bounds([COEF1_RANGE[0], COEF2_RANGE[0]], 
+                    [COEF1_RANGE[1], COEF2_RANGE[1]])
+    
+    def callback_de(xk, convergence):
+        """Callback для отслеживания прогресса в differential_evolution"""
+        return target_achieved
+    
+    if OPTIMIZATION_MODE == 'parallel':
+        objective = ParallelObjective(rocket, OPTIMIZATION_WORKERS)
+        print(f"Пул процессов: {objective.workers}")
+    elif OPTIMIZATION_MODE == 'ensemble':
+        objective = improved_objective_batch
+    else:
+        objective = improved_objective_function
+    vectorized = OPTIMIZATION_MODE != 'serial'
+
+    # пул процессов закрывается и при исключении или прерывании (Ctrl+C)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            result_stage1 = differential_evolution(
+                objective, 
+                bounds, 
+                strategy='best1bin',
+                maxiter=30,
+                popsize=15,
+                tol=0.001,
+                disp=True,
+                seed=42,
+                mutation=(0.5, 1.0),
+                recombination=0.7,
+                callback=callback_de,
+                vectorized=vectorized,
+                updating='deferred' if vectorized else 'immediate'
+            )
+    finally:
+        if isinstance(objective, ParallelObjective):
+            objective.close()
+    
+    # Проверяем, не достигнута ли цель
+    if target_achieved:
+        print("🎯 Цель достигнута на стадии глобального поиска!")
+        return best_coefficients
+    
+    print(f"Результат глобального поиска: {result_stage1.x}, score={result_stage1.fun:.4f}")
+    
+    # Стадия 2: Локальная оптимизация
+    print("\n--- СТАДИЯ 2: Локальная оптимизация (SLSQP) ---")
+    
+    def callback_local(xk):
+        """Callback для отслеживания прогресса в локальной оптимизации"""
+        return target_achieved
+    
+    result_stage2 = minimize(
+        improved_objective_function,
+        result_stage1.x,
+        method='SLSQP',
+        bounds=[COEF1_RANGE, COEF2_RANGE],
+        options={'maxiter': 50, 'disp': True, 'ftol': 1e-8, 'eps': 1e-4},
+        callback=callback_local
+    )
+    
+    # Проверяем, не достигнута ли цель
+    if target_achieved:
+        print("🎯 Цель достигнута на стадии локальной оптимизации!")
+        return best_coefficients
+    
+    print(f"Результат локальной оптимизации: {result_stage2.x}, score={result_stage2.fun:.4f}")
+    
+    # Стадия 3: Финальная тонкая настройка (только если цель еще не достигнута)
+    print("\n--- СТАДИЯ 3: Тонкая настройка (Nelder-Mead) ---")
+    result_stage3 = minimize(
+        improved_objective_function,
+        result_stage2.x,
+        method='Nelder-Mead',
+        options={'maxiter': 30, 'disp': True, 'xatol': 1e-5, 'fatol': 1e-5},
+        callback=callback_local
+    )
+    
+    print(f"Финальный результат: {result_stage3.x}, score={result_stage3.fun:.4f}")
+    
+    return result_stage3.x
+
+def optimize_coefficients_if_needed():
+    """Оптимизирует коэффициенты только если это необходимо"""
+    global best_coefficients, best_score, target_achieved
+    
+    # Сначала проверяем текущие коэффициенты
+    coefficients_ok, current_coefs = check_current_coefficients()
+    
+    if coefficients_ok:
+        best_coefficients = current_coefs
+        best_score = 0
+        target_achieved = True
+        print(f"\n✅ Используем текущие коэффициенты: {best_coefficients}")
+        return best_coefficients
+    
+    # Если нужна оптимизация, запускаем многостадийный процесс
+    print(f"\n🔄 Запуск оптимизации коэффициентов в диапазонах:")
+    print(f"   coef1: {COEF1_RANGE[0]} - {COEF1_RANGE[1]}")
+    print(f"   coef2: {COEF2_RANGE[0]} - {COEF2_RANGE[1]}")
+    
+    best_coefficients = multi_stage_optimization()
+    if EVAL_CACHE:
+        print(f"Кэш расчетов: {get_eval_cache().stats()}")
+    
+    if target_achieved:
+        print(f"\n🎉 ОПТИМИЗАЦИЯ ЗАВЕРШЕНА - ЦЕЛЬ ДОСТИГНУТА!")
+        print(f"Лучшие коэффициенты: {best_coefficients}")
+    else:
+        print(f"\n🎉 ОПТИМИЗАЦИЯ ЗАВЕРШЕНА!")
+        print(f"Лучшие коэффициенты: {best_coefficients}")
+        print(f"Лучший score: {best_score:.6f}")
+    
+    # Проверяем, что коэффициенты в нужных диапазонах
+    coef1_ok = COEF1_RANGE[0] <= best_coefficients[0] <= COEF1_RANGE[1]
+    coef2_ok = COEF2_RANGE[0] <= best_coefficients[1] <= COEF2_RANGE[1]
+    
+    if not coef1_ok or not coef2_ok:
+        print(f"⚠️  ВНИМАНИЕ: коэффициенты вышли за допустимые границы!")
+        if not coef1_ok:
+            print(f"   coef1={best_coefficients[0]} должен быть в диапазоне {COEF1_RANGE}")
+        if not coef2_ok:
+            print(f"   coef2={best_coefficients[1]} должен быть в диапазоне {COEF2_RANGE}")
+        
+        # Обрезаем коэффициенты до допустимых значений
+        best_coefficients[0] = max(COEF1_RANGE[0], min(COEF1_RANGE[1], best_coefficients[0]))
+        best_coefficients[1] = max(COEF2_RANGE[0], min(COEF2_RANGE[1], best_coefficients[1]))
+        print(f"   Обрезанные коэффициенты: {best_coefficients}")
+    
+    # Выводим историю лучших результатов
+    if optimization_history:
+        print(f"\n📊 ИСТОРИЯ ОПТИМИЗАЦИИ (топ-5):")
+        sorted_history = sorted(optimization_history, key=lambda x: x['score'])[:5]
+        for i, result in enumerate(sorted_history):
+            print(f"{i+1}. coefs={result['coefs']}, v={result['velocity']:.1f} м/с, "
+                  f"h={result['altitude']/1000:.1f} км, angle={result['angle']:.1f}°, "
+                  f"final_α={result['final_attack']:.1f}°, score={result['score']:.4f}")
+    
+    return best_coefficients
+
+def analyze_trajectory(sol, coefs):
+    """Анализирует траекторию и дает рекомендации"""
+    if not sol or len(sol.y[2]) == 0:
+        return
+    
+    final_velocity = sol.y[2][-1]
+    final_altitude = sol.y[3][-1]
+    final_angle = sol.y[1][-1] * 180/math.pi
+    final_attack = telemetry['attack'][-1] if len(telemetry) else 0
+    
+    print(f"\n📈 АНАЛИЗ ТРАЕКТОРИИ:")
+    print(f"Финальная скорость: {final_velocity:.1f} м/с")
+    print(f"Финальная высота: {final_altitude/1000:.1f} км")
+    print(f"Финальный угол траектории: {final_angle:.1f}°")
+    print(f"Финальный угол атаки: {final_attack:.1f}°")
+    
+    # Анализ угла атаки
+    if abs(final_attack) < TARGET_FINAL_ATTACK_MIN:
+        print("❌ ПРОБЛЕМА: Слишком маленький финальный угол атаки")
+        print("   Рекомендация: Увеличить коэффициенты управления углом атаки")
+    else:
+        print("✅ Финальный угол атаки достиг цели")
+    
+    # Остальной анализ проблем
+    target_altitude = 200000
+    if final_altitude > target_altitude + 100000:
+        print("❌ ПРОБЛЕМА: Слишком большая высота")
+        print("   Рекомендация: Увеличить коэффициент наклона траектории")
+    elif final_altitude < target_altitude - 50000:
+        print("❌ ПРОБЛЕМА: Слишком малая высота")
+        print("   Рекомендация: Уменьшить коэффициент наклона траектории")
+    
+    if abs(final_angle) > 45:
+        print("❌ ПРОБЛЕМА: Слишком большой угол траектории")
+        print("   Рекомендация: Настроить коэффициенты управления углом")
+
+def final_simulation_with_coefficients(coefs, description=""):
+    """Запускает финальную симуляцию с заданными коэффициентами"""
+    telemetry.reset()
+    
+    print(f"\n{description}")
+    print(f"Коэффициенты: {coefs}")
+    
+    # Проверяем границы коэффициентов
+    coef1_ok = COEF1_RANGE[0] <= coefs[0] <= COEF1_RANGE[1]
+    coef2_ok = COEF2_RANGE[0] <= coefs[1] <= COEF2_RANGE[1]
+    
+    if not coef1_ok or not coef2_ok:
+        print(f"⚠️  ВНИМАНИЕ: коэффициенты вне допустимых диапазонов!")
+        print(f"   coef1 должен быть в {COEF1_RANGE}, сейчас {coefs[0]}")
+        print(f"   coef2 должен быть в {COEF2_RANGE}, сейчас {coefs[1]}")
+        return None
+    
+    try:
+        sol = engine.run(NOMINAL_Y0, coefs, record=True)
+        
+        if sol.success:
+            # Анализ траектории
+            analyze_trajectory(sol, coefs)
+            
+            fall_detected = sol.t_events and len(sol.t_events[0]) > 0
+            
+            print("\n=== РЕЗУЛЬТАТЫ ===")
+            if fall_detected:
+                fall_time = sol.t_events[0][0]
+                print(f"❌ ПАДЕНИЕ на {fall_time:.1f} секунде")
+            else:
+                final_velocity = sol.y[2][-1]
+                final_altitude = sol.y[3][-1]
+                final_angle = sol.y[1][-1] * 180/math.pi
+                final_attack = telemetry['attack'][-1] if len(telemetry) else 0
+                
+                print(f"Конечная скорость: {final_velocity:.2f} м/с")
+                print(f"Конечная высота: {final_altitude/1000:.2f} км")
+                print(f"Конечный угол траектории: {final_angle:.2f}°")
+                print(f"Конечный угол атаки: {final_attack:.2f}°")
+            
+            if len(telemetry):
+                print(f"Максимальная атака: {telemetry['attack'].max():.2f}°")
+                print(f"Атака в конце: {telemetry['attack'][-1]:.2f}°")
+            
+            # Проверка целевых параметров
+            if not fall_detected:
+                target_velocity = TARGET_VELOCITY
+                target_altitude_min = TARGET_ALTITUDE_MIN
+                target_altitude_max = TARGET_ALTITUDE_MAX  
+                target_angle_range = TARGET_ANGLE_RANGE
+                
+                final_velocity = sol.y[2][-1]
+                final_altitude = sol.y[3][-1]
+                final_angle = sol.y[1][-1] * 180/math.pi
+                final_attack = telemetry['attack'][-1] if len(telemetry) else 0
+                
+                print(f"\n=== ПРОВЕРКА ЦЕЛЕВЫХ ПАРАМЕТРОВ ===")
+                print(f"Целевая скорость: > {target_velocity} м/с")
+                print(f"Достигнутая скорость: {final_velocity:.2f} м/с - {'✅' if final_velocity >= target_velocity else '❌'}")
+                
+                print(f"Целевая высота: {target_altitude_min/1000:.1f}-{target_altitude_max/1000:.1f} км")
+                print(f"Достигнутая высота: {final_altitude/1000:.2f} км - "
+                      f"{'✅' if target_altitude_min <= final_altitude <= target_altitude_max else '❌'}")
+                
+                print(f"Целевой угол траектории: 0±{target_angle_range}°")
+                print(f"Достигнутый угол траектории: {final_angle:.2f}° - "
+                      f"{'✅' if abs(final_angle) <= target_angle_range else '❌'}")
+                
+                print(f"Целевой финальный угол атаки: > {TARGET_FINAL_ATTACK_MIN}°")
+                print(f"Достигнутый финальный угол атаки: {final_attack:.2f}° - "
+                      f"{'✅' if abs(final_attack) >= TARGET_FINAL_ATTACK_MIN else '❌'}")
+                
+                velocity_ok = final_velocity >= target_velocity
+                altitude_ok = target_altitude_min <= final_altitude <= target_altitude_max
+                angle_ok = abs(final_angle) <= target_angle_range
+                attack_ok = abs(final_attack) >= TARGET_FINAL_ATTACK_MIN
+
+                if velocity_ok and altitude_ok and angle_ok and attack_ok:
+                    print(f"\n🎯 ВСЕ ЦЕЛЕВЫЕ ПАРАМЕТРЫ ДОСТИГНУТЫ!")
+                    update_rocket_json(coefs.tolist() if hasattr(coefs, 'tolist') else coefs)
+                else:
+                    print(f"\n⚠️  Не все целевые параметры достигнуты. Необходима дальнейшая оптимизация.")
+            
+            output(parser)
+        
+        return sol
+        
+    except Exception as e:
+        print(f"❌ Ошибка при финальной симуляции: {e}")
+        return None
+
+def output(parser, csv_export=None):
+    """Сохранение динамических коэффициентов последней записи в output/"""
+    base = "output/" + parser.name + "_dynamic_coefs"
+    columnar.write(base + ".traj", {name: telemetry[name] for name in OUTPUT_FIELDS},
+                   meta={'rocket': parser.name, 'step': telemetry.step})
+    print(f"Data was moved to '{base}.traj'.")
+    if OUTPUT_CSV if csv_export is None else csv_export:
+        columnar.export_csv(base + ".traj", base + ".csv")
+
+def main():
+    """Основная функция"""
+    global target_achieved
+    
+    print("ЗАПУСК БАЛЛИСТИЧЕСКОГО РАСЧЕТА")
+    print("=" * 60)
+    print("Целевые параметры:")
+    print(f"- Скорость > {TARGET_VELOCITY} м/с (первая космическая)")
+    print(f"- Высота: {TARGET_ALTITUDE_MIN/1000}-{TARGET_ALTITUDE_MAX/1000} км")
+    print(f"- Угол наклона траектории: 0±{TARGET_ANGLE_RANGE}°")
+    print(f"- Финальный угол атаки: > {TARGET_FINAL_ATTACK_MIN}°")
+    print("=" * 60)
+    print(f"Диапазоны коэффициентов:")
+    print(f"- coef1: {COEF1_RANGE[0]} - {COEF1_RANGE[1]}")
+    print(f"- coef2: {COEF2_RANGE[0]} - {COEF2_RANGE[1]}")
+    print("=" * 60)
+    
+    # Проверяем текущие коэффициенты и оптимизируем только если нужно
+    final_coefficients = optimize_coefficients_if_needed()
+    
+    # Запускаем финальную симуляцию только если цель не была достигнута ранее
+    if not target_achieved and best_coefficients is not None:
+        final_simulation_with_coefficients(final_coefficients, "ФИНАЛЬНАЯ СИМУЛЯЦИЯ:")
+    elif target_achieved:
+        print(f"\n✅ Оптимизация не требуется - целевые параметры уже достигнуты!")
+        print(f"Используемые коэффициенты: {best_coefficients}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import csv
+import json
+import os
+import numpy as np
+
+# Колоночный формат записи траекторий: каталог с header.json и файлом
+# <поле>.f8 на каждую колонку (float64, little-endian, без заголовка).
+# Колонки дописываются кусками по мере расчета и читаются через memmap.
+#
+# header.json: {"version", "fields", "dtype", "count", "complete", "meta"};
+# у незавершенной записи (complete = false) число строк берется по
+# размеру самого короткого файла колонки.
+
+COLUMNAR_VERSION = 1
+DTYPE = np.dtype('<f8')
+HEADER = "header.json"
+
+def column_file(dirname, name):
+    return os.path.join(dirname, name + ".f8")
+
+class ColumnWriter:
+    def __init__(self, dirname, fields, meta=None):
+        self.dirname = dirname
+        self.fields = tuple(fields)
+        self.meta = {} if meta is None else meta
+        self.count = 0
+        os.makedirs(dirname, exist_ok=True)
+        self.files = {name: open(column_file(dirname, name), 'wb') for name in self.fields}
+        self._write_header(complete=False)
+
+    def _write_header(self, complete):
+        with open(os.path.join(self.dirname, HEADER), 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': COLUMNAR_VERSION,
+                'fields': list(self.fields),
+                'dtype': DTYPE.str,
+                'count': self.count,
+                'complete': complete,
+                'meta': self.meta,
+            }, f, ensure_ascii=False, indent=1)
+
+    def append(self, columns):
+        """Дописывает кусок: columns - словарь поле -> массив одинаковой длины"""
+        size = None
+        for name in self.fields:
+            values = np.ascontiguousarray(columns[name], dtype=DTYPE)
+            if size is None:
+                size = len(values)
+            elif len(values) != size:
+                raise ValueError(f"Column {name} has {len(values)} values, expected {size}")
+            self.files[name].write(values.tobytes())
+        self.count += size or 0
+
+    def close(self):
+        if self.files is None:
+            return
+        for f in self.files.values():
+            f.close()
+        self.files = None
+        self._write_header(complete=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write(dirname, columns, meta=None):
+    """Записывает словарь колонок целиком"""
+    with ColumnWriter(dirname, columns.keys(), meta) as writer:
+        writer.append(columns)
+
+def read_header(dirname):
+    with open(os.path.join(dirname, HEADER), 'r', encoding='utf-8') as f:
+        header = json.load(f)
+    if header.get('version') != COLUMNAR_VERSION:
+        raise ValueError(f"{dirname} is not a columnar trajectory version {COLUMNAR_VERSION}")
+    if not header['complete']:
+        header['count'] = min(os.path.getsize(column_file(dirname, name)) // DTYPE.itemsize
+                              for name in header['fields'])
+    return header
+
+def read(dirname, fields=None):
+    """Словарь поле -> массив (memmap только для чтения)"""
+    header = read_header(dirname)
+    count = header['count']
+    columns = {}
+    for name in header['fields'] if fields is None else fields:
+        if count == 0:
+            columns[name] = np.empty(0, dtype=DTYPE)
+        else:
+            columns[name] = np.memmap(column_file(dirname, name), dtype=DTYPE, mode='r', shape=(count,))
+    return columns
+
+def export_csv(dirname, filename, fields=None):
+    """CSV для просмотра: заголовок из имен полей, значения - кратчайшая точная запись float"""
+    columns = read(dirname, fields)
+    names = list(columns)
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        csv.writer(csvfile).writerow(names)
+        if names:
+            rows = np.column_stack([columns[name] for name in names]).tolist()
+            csvfile.writelines(",".join(map(repr, row)) + "\n" for row in rows)
+    print(f"Data was moved to '{filename}'.")
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    n = 80000
+    fields = ('time', 'wind', 'Cbs', 'Cyw', 'Cww', 'Cyy', 'Cwy', 'Cwb', 'Csb')
+    rng = np.random.default_rng(0)
+    data = {name: rng.standard_normal(n) for name in fields}
+    data['time'] = np.arange(n) * 0.01
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dirname = os.path.join(tmp, "demo.traj")
+        start = time.perf_counter()
+        with ColumnWriter(dirname, fields) as writer:
+            for k in range(0, n, 8192):
+                writer.append({name: data[name][k:k + 8192] for name in fields})
+        write_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        columns = {name: np.array(column) for name, column in read(dirname).items()}
+        read_time = time.perf_counter() - start
+        print(f"{n} rows x {len(fields)} columns: write {write_time * 1e3:.1f} ms, read {read_time * 1e3:.1f} ms")
+        print("round trip exact:", all(np.array_equal(columns[name], data[name]) for name in fields))
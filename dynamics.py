@@ -1,7 +1,9 @@
 import numpy as np
 import matplotlib.pyplot as plt
+import os
 import path
 import csv
+import columnar
 
 def read_aero_coefficients_from_csv(filename, N):
     """
@@ -44,11 +46,47 @@ def read_aero_coefficients_from_csv(filename, N):
     
     return Cwv, Cww, Cwb, Cvv, Cvb, Cvw, Wind
 
+def read_aero_coefficients_from_columns(dirname, N):
+    """
+    Чтение аэродинамических коэффициентов из колоночного файла (columnar, *.traj)
+    """
+    Cwv = np.zeros(N)
+    Cww = np.zeros(N)
+    Cwb = np.zeros(N)
+    Cvv = np.zeros(N)
+    Cvb = np.zeros(N)
+    Cvw = np.zeros(N)
+    Wind = np.zeros(N)
+
+    try:
+        columns = columnar.read(dirname, ('Cyw', 'Cww', 'Cwb', 'Cyy', 'Cbs', 'wind'))
+        n = min(N, len(columns['Cyw']))
+        Cvw[:n] = columns['Cyw'][:n]
+        Cww[:n] = columns['Cww'][:n]
+        Cwb[:n] = columns['Cwb'][:n]
+        Cvv[:n] = columns['Cyy'][:n]
+        Cvb[:n] = -columns['Cbs'][:n]
+        Wind[:n] = columns['wind'][:n]
+        print(f"Успешно прочитано {n} строк из {dirname}")
+
+    except FileNotFoundError:
+        print(f"Файл {dirname} не найден")
+    except Exception as e:
+        print(f"Ошибка при чтении файла {dirname}: {e}")
+
+    return Cwv, Cww, Cwb, Cvv, Cvb, Cvw, Wind
+
+def read_aero_coefficients(filename, N):
+    """Чтение из колоночного файла filename.traj, если он есть, иначе из filename.csv"""
+    if os.path.isdir(filename + ".traj"):
+        return read_aero_coefficients_from_columns(filename + ".traj", N)
+    return read_aero_coefficients_from_csv(filename + ".csv", N)
+
 # Основной код
 N = 3840
 
 # Инициализация массивов
-Cwv, Cww, Cwb, Cvv, Cvb, Cvw, Wind = read_aero_coefficients_from_csv("output/dynamic_coefs.csv", N)
+Cwv, Cww, Cwb, Cvv, Cvb, Cvw, Wind = read_aero_coefficients("output/dynamic_coefs", N)
 
 # Остальные массивы (не из файла)
 Ms = np.empty(N)
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+
+# Постоянный кэш расчетов траекторий: файл JSON-строк, в который только
+# дописываются записи, и индекс в памяти. Ключ - хеш JSON ракеты,
+# коэффициенты программы атаки, округленные до digits знаков после запятой,
+# и настройки интегрирования; значение - конечные параметры траектории.
+#
+# Строка файла: {"key": [rocket_hash, [coef1, coef2], settings], "value": ...}
+
+EVAL_CACHE_VERSION = 1
+
+# Знаков после запятой в ключе: конечные разности SLSQP (eps = 1e-4) различимы
+DIGITS = 9
+
+def file_hash(filename):
+    """Хеш содержимого файла (JSON ракеты)"""
+    with open(filename, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+class EvalCache:
+    def __init__(self, filename, digits=DIGITS):
+        self.filename = filename
+        self.digits = digits
+        self.index = {}
+        self.hits = 0
+        self.misses = 0
+        # файл оборван на середине строки: следующая запись начинается с новой строки
+        self._torn = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                self._torn = not line.endswith("\n")
+                try:
+                    record = json.loads(line)
+                    key = self._dump(record['key'])
+                except (ValueError, KeyError, TypeError):
+                    # недописанная строка прерванного расчета
+                    continue
+                self.index[key] = record['value']
+
+    @staticmethod
+    def _dump(obj):
+        return json.dumps(obj, separators=(',', ':'), sort_keys=True)
+
+    def key(self, rocket_hash, coefs, settings):
+        """Ключ записи: settings - словарь настроек, от которых зависит результат"""
+        return [rocket_hash, [round(float(c), self.digits) for c in coefs],
+                dict(settings, version=EVAL_CACHE_VERSION)]
+
+    def get(self, key, default=None):
+        value = self.index.get(self._dump(key), default)
+        if value is default:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Дописывает запись в файл; повторный ключ не записывается"""
+        text = self._dump(key)
+        if text in self.index:
+            return
+        self.index[text] = value
+        os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+        with open(self.filename, 'a', encoding='utf-8') as f:
+            if self._torn:
+                f.write("\n")
+                self._torn = False
+            f.write(json.dumps({'key': key, 'value': value}, separators=(',', ':')) + "\n")
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return self._dump(key) in self.index
+
+    def stats(self):
+        return f"{len(self)} records, {self.hits} hits, {self.misses} misses"
+
+if __name__ == "__main__":
+    import path
+
+    cache = EvalCache(os.path.join(path.cache_path, "evaluations.jsonl"))
+    print(f"{cache.filename}: {cache.stats()}")
@@ -0,0 +1,95 @@
+import csv
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import aero_grid
+import atmosphere
+import ballistics
+import path
+import rocket_parser as rp
+
+# Пакетный расчет всех ракет из rocket_lib: разбор JSON, аэродинамическая
+# сетка и номинальная траектория для каждой ракеты в отдельном процессе.
+# Строки сводной таблицы пишутся на диск по мере готовности ракет.
+
+SUMMARY_FIELDS = ('rocket', 'name', 'status', 'burn_time', 'flight_time', 'final_velocity',
+                  'final_altitude', 'max_q', 'max_q_time', 'wall_time')
+
+def discover(rocket_lib=None):
+    """Файлы ракет в rocket_lib"""
+    return sorted(glob.glob(os.path.join(path.rocket_lib if rocket_lib is None else rocket_lib, "*.json")))
+
+def evaluate_rocket(filename):
+    """Строка сводной таблицы для одной ракеты"""
+    start = time.perf_counter()
+    row = dict.fromkeys(SUMMARY_FIELDS, '')
+    row['rocket'] = os.path.splitext(os.path.basename(filename))[0]
+    try:
+        parser = rp.rocket_parser(filename)
+        row['name'] = parser.name
+        row['burn_time'] = parser.get_full_time()
+
+        # программа угла атаки из JSON ракеты (attack_coefs)
+        engine = ballistics.Trajectory(parser)
+        engine.G.use_aero_grid(aero_grid.AeroGrid.load_or_build(engine.G))
+
+        sol = engine.run(ballistics.NOMINAL_Y0, flight_events=True)
+        if not sol.success:
+            row['status'] = "integration failed: " + sol.message
+        else:
+            altitude = sol.y[3]
+            # максимум напора - по найденным событиям max_q (точки шагов - запасной вариант)
+            times, states = sol.t, sol.y
+            if hasattr(sol, 'event_states'):
+                times = np.append(times, sol.event_times['max_q'])
+                states = np.hstack((states, sol.event_states['max_q'].T))
+            density = np.nan_to_num(atmosphere.atmosphere_profile(np.maximum(states[3], 0)).density)
+            q = np.where(states[3] > ballistics.AERO_CEILING, 0, density * states[2]**2/2)
+            k = int(np.argmax(q))
+
+            row['status'] = 'fall' if len(sol.t_events[0]) > 0 else 'ok'
+            row['flight_time'] = sol.t[-1]
+            row['final_velocity'] = sol.y[2][-1]
+            row['final_altitude'] = altitude[-1]
+            row['max_q'] = q[k]
+            row['max_q_time'] = times[k]
+    except Exception as e:
+        row['status'] = f"error: {e}"
+    row['wall_time'] = time.perf_counter() - start
+    return row
+
+def run_fleet(files=None, workers=None, filename=None):
+    """
+    Расчет ракет в пуле процессов (workers - число процессов, по умолчанию
+    по числу ядер). Каждая готовая строка сразу дописывается в CSV.
+    """
+    files = discover() if files is None else files
+    filename = os.path.join(path.home, "output", "fleet_summary.csv") if filename is None else filename
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+    rows = []
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        csvfile.flush()
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(evaluate_rocket, f) for f in files]
+            for future in as_completed(futures):
+                row = future.result()
+                writer.writerow(row)
+                csvfile.flush()
+                rows.append(row)
+                print(f"{row['rocket']}: {row['status']}, {row['wall_time']:.1f} s")
+
+    print(f"Data was moved to '{filename}'.")
+    return rows
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    rows = run_fleet()
+    wall = time.perf_counter() - start
+    busy = sum(row['wall_time'] for row in rows)
+    print(f"{len(rows)} rockets, {os.cpu_count()} cores: wall {wall:.1f} s, sum of rocket times {busy:.1f} s")
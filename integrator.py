@@ -0,0 +1,608 @@
+import math
+import numpy as np
+from scipy.optimize import brentq
+
+# Явные методы Рунге-Кутты для небольших систем ОДУ (траектория выведения).
+# RK45 повторяет алгоритм solve_ivp(method='RK45'): те же коэффициенты
+# Дормана-Принса, выбор первого шага, управление шагом и поиск событий,
+# поэтому решения совпадают с solve_ivp до ошибок округления. RK4 - классический
+# метод с постоянным шагом. Накладные расходы на шаг в несколько раз меньше,
+# чем у solve_ivp, что заметно при дешевой правой части.
+
+# Коэффициенты Дормана-Принса 5(4) (как в scipy.integrate.RK45)
+C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1])
+A = np.array([
+    [0, 0, 0, 0, 0],
+    [1/5, 0, 0, 0, 0],
+    [3/40, 9/40, 0, 0, 0],
+    [44/45, -56/15, 32/9, 0, 0],
+    [19372/6561, -25360/2187, 64448/6561, -212/729, 0],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656]
+])
+B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84])
+E = np.array([-71/57600, 0, 71/16695, -71/1920, 17253/339200, -22/525, 1/40])
+# Непрерывное продолжение 4-го порядка
+P = np.array([
+    [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+    [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+    [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+    [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+    [0, 40617522/29380423, -110615467/29380423, 69997945/29380423]
+])
+
+SAFETY = 0.9
+MIN_FACTOR = 0.2
+MAX_FACTOR = 10
+
+EPS = np.finfo(float).eps
+
+class DenseOutput:
+    """
+    Непрерывное решение по шагам: на шаге [t_old, t_old + h]
+    y = y_old + h * Q @ (x, x^2, ...), x = (t - t_old) / h
+    """
+    def __init__(self, t, y_old, Q):
+        self.t = np.asarray(t)
+        self.y_old = np.asarray(y_old)
+        self.Q = np.asarray(Q)
+
+    def segment(self, t):
+        return min(max(int(np.searchsorted(self.t, t, side='right')) - 1, 0), len(self.t) - 2)
+
+    def __call__(self, t):
+        t = np.asarray(t, dtype=np.float64)
+        if t.ndim == 0:
+            i = self.segment(t)
+            return _interpolate(self.t[i], self.t[i + 1] - self.t[i], self.y_old[i], self.Q[i], float(t))
+        i = np.clip(np.searchsorted(self.t, t, side='right') - 1, 0, len(self.t) - 2)
+        h = self.t[i + 1] - self.t[i]
+        x = (t - self.t[i]) / h
+        p = np.cumprod(np.repeat(x[:, np.newaxis], self.Q.shape[2], axis=1), axis=1)
+        return (self.y_old[i] + h[:, np.newaxis] * np.einsum('kij,kj->ki', self.Q[i], p)).T
+
+class Solution:
+    """Результат интегрирования с полями как у solve_ivp"""
+    def __init__(self, t, y, t_events, y_events, nfev, status, message, sol=None):
+        self.t = t
+        self.y = y
+        self.t_events = t_events
+        self.y_events = y_events
+        self.nfev = nfev
+        self.status = status
+        self.message = message
+        self.success = status >= 0
+        self.sol = sol
+
+MESSAGES = {
+    0: "The solver successfully reached the end of the integration interval.",
+    1: "A termination event occurred.",
+}
+
+def _interpolate(t_old, h, y_old, Q, t):
+    x = (t - t_old) / h
+    p = np.cumprod(np.full(Q.shape[1], x))
+    return y_old + h * np.dot(Q, p)
+
+def _norm(x):
+    """Среднеквадратичная норма"""
+    return math.sqrt(x.dot(x)) / x.size**0.5
+
+class _Events:
+    """Поиск событий event(t, y) = 0 по смене знака между шагами, корни - brentq по интерполянту"""
+    def __init__(self, events, t0, y0):
+        if events is None:
+            events = []
+        elif callable(events):
+            events = [events]
+        self.events = events
+        self.direction = [getattr(e, 'direction', 0) for e in events]
+        self.max_events = [_max_events(e) for e in events]
+        self.count = [0] * len(events)
+        self.t_events = [[] for _ in events]
+        self.y_events = [[] for _ in events]
+        self.g = [e(t0, y0) for e in events]
+
+    def step(self, t_old, t, y, interpolant):
+        """Обрабатывает шаг [t_old, t]; возвращает время терминального события или None"""
+        if not self.events:
+            return None
+        g_new = [e(t, y) for e in self.events]
+        active = []
+        for k, (g0, g1, d) in enumerate(zip(self.g, g_new, self.direction)):
+            up = g0 <= 0 <= g1
+            down = g0 >= 0 >= g1
+            if (up and d > 0) or (down and d < 0) or ((up or down) and d == 0):
+                active.append(k)
+        self.g = g_new
+        if not active:
+            return None
+
+        roots = []
+        for k in active:
+            self.count[k] += 1
+            event = self.events[k]
+            roots.append(brentq(lambda s: event(s, interpolant(s)), t_old, t, xtol=4*EPS, rtol=4*EPS))
+
+        terminal = None
+        if any(self.count[k] >= self.max_events[k] for k in active):
+            order = sorted(range(len(active)), key=lambda j: roots[j])
+            active = [active[j] for j in order]
+            roots = [roots[j] for j in order]
+            last = next(j for j, k in enumerate(active) if self.count[k] >= self.max_events[k])
+            active, roots = active[:last + 1], roots[:last + 1]
+            terminal = roots[-1]
+
+        for k, te in zip(active, roots):
+            self.t_events[k].append(te)
+            self.y_events[k].append(interpolant(te))
+        return terminal
+
+    def result(self, n):
+        t_events = [np.asarray(te) for te in self.t_events]
+        y_events = [np.asarray(ye) if ye else np.empty((0, n)) for ye in self.y_events]
+        return t_events, y_events
+
+def _max_events(event):
+    terminal = getattr(event, 'terminal', False)
+    if terminal is True:
+        return 1
+    if terminal is False or terminal is None:
+        return np.inf
+    return terminal
+
+def _initial_step(fun, t0, y0, f0, t_bound, max_step, rtol, atol, order=4):
+    """Первый шаг по алгоритму Хайрера (как select_initial_step в scipy)"""
+    interval_length = abs(t_bound - t0)
+    if interval_length == 0.0:
+        return 0.0
+    scale = atol + np.abs(y0) * rtol
+    d0 = _norm(y0 / scale)
+    d1 = _norm(f0 / scale)
+    h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+    h0 = min(h0, interval_length)
+    f1 = fun(t0 + h0, y0 + h0 * f0)
+    d2 = _norm((f1 - f0) / scale) / h0
+    if d1 <= 1e-15 and d2 <= 1e-15:
+        h1 = max(1e-6, h0 * 1e-3)
+    else:
+        h1 = (0.01 / max(d1, d2)) ** (1 / (order + 1))
+    return min(100 * h0, h1, interval_length, max_step)
+
+def _wrap(fun):
+    """Правая часть, возвращающая массив float, и счетчик ее вызовов"""
+    nfev = [0]
+    def wrapped(t, y):
+        nfev[0] += 1
+        return np.asarray(fun(t, y), dtype=np.float64)
+    return wrapped, nfev
+
+def rk45(fun, t_span, y0, max_step=np.inf, rtol=1e-3, atol=1e-6, events=None, dense_output=False, first_step=None):
+    """
+    Метод Дормана-Принса 5(4) с управлением шагом, аналог
+    solve_ivp(fun, t_span, y0, method='RK45', ...) для интегрирования вперед
+    """
+    fun, nfev = _wrap(fun)
+    t, t_bound = float(t_span[0]), float(t_span[1])
+    y = np.array(y0, dtype=np.float64)
+    n = y.size
+    f = fun(t, y)
+    if first_step is None:
+        h_abs = _initial_step(fun, t, y, f, t_bound, max_step, rtol, atol)
+    else:
+        h_abs = first_step
+    error_exponent = -1 / 5
+
+    K = np.empty((7, n))
+    stages = [(A[s, :s], C[s]) for s in range(1, 6)]
+    ev = _Events(events, t, y)
+    ts, ys = [t], [y]
+    steps_t, steps_y, steps_Q = [t], [], []
+    status = None
+    message = None
+
+    while status is None:
+        if t == t_bound:
+            status = 0
+            break
+        min_step = 10 * abs(np.nextafter(t, np.inf) - t)
+        if h_abs > max_step:
+            h_abs = max_step
+        elif h_abs < min_step:
+            h_abs = min_step
+
+        step_rejected = False
+        while True:
+            if h_abs < min_step:
+                status, message = -1, "Required step size is less than spacing between numbers."
+                break
+            t_new = t + h_abs
+            if t_new - t_bound > 0:
+                t_new = t_bound
+            h = t_new - t
+            h_abs = abs(h)
+
+            K[0] = f
+            for s, (a, c) in enumerate(stages, start=1):
+                dy = np.dot(K[:s].T, a) * h
+                K[s] = fun(t + c * h, y + dy)
+            y_new = y + h * np.dot(K[:-1].T, B)
+            f_new = fun(t + h, y_new)
+            K[-1] = f_new
+
+            scale = atol + np.maximum(np.abs(y), np.abs(y_new)) * rtol
+            error_norm = _norm(np.dot(K.T, E) * h / scale)
+            if error_norm < 1:
+                factor = MAX_FACTOR if error_norm == 0 else min(MAX_FACTOR, SAFETY * error_norm ** error_exponent)
+                if step_rejected:
+                    factor = min(1, factor)
+                h_abs *= factor
+                break
+            h_abs *= max(MIN_FACTOR, SAFETY * error_norm ** error_exponent)
+            step_rejected = True
+        if status is not None:
+            break
+
+        Q = K.T.dot(P)
+        t_old, y_old = t, y
+        t, y, f = t_new, y_new, f_new
+        if t - t_bound >= 0:
+            status = 0
+
+        terminal = ev.step(t_old, t, y, lambda s: _interpolate(t_old, h, y_old, Q, s))
+        if terminal is not None:
+            status = 1
+            t = terminal
+            y = _interpolate(t_old, h, y_old, Q, t)
+
+        ts.append(t)
+        ys.append(y)
+        if dense_output:
+            steps_t.append(t_new)
+            steps_y.append(y_old)
+            steps_Q.append(Q)
+
+    t_events, y_events = ev.result(n)
+    sol = DenseOutput(steps_t, steps_y, steps_Q) if dense_output and steps_Q else None
+    return Solution(np.array(ts), np.array(ys).T, t_events, y_events, nfev[0], status,
+                    MESSAGES.get(status, message), sol)
+
+def rk4(fun, t_span, y0, step, events=None, dense_output=False):
+    """
+    Классический метод Рунге-Кутты 4-го порядка с постоянным шагом step
+    (последний шаг укорачивается до конца интервала). Между узлами -
+    кубический эрмитов интерполянт, производная в конце шага берется
+    из первой стадии следующего шага, лишних вызовов нет.
+    """
+    fun, nfev = _wrap(fun)
+    t, t_bound = float(t_span[0]), float(t_span[1])
+    y = np.array(y0, dtype=np.float64)
+    n = y.size
+    f = fun(t, y)
+    ev = _Events(events, t, y)
+    ts, ys = [t], [y]
+    steps_t, steps_y, steps_Q = [t], [], []
+    status = None
+    k = 0
+
+    while status is None:
+        if t >= t_bound:
+            status = 0
+            break
+        k += 1
+        t_new = min(float(t_span[0]) + k * step, t_bound)
+        h = t_new - t
+
+        k2 = fun(t + h/2, y + h/2 * f)
+        k3 = fun(t + h/2, y + h/2 * k2)
+        k4 = fun(t_new, y + h * k3)
+        y_new = y + h/6 * (f + 2*k2 + 2*k3 + k4)
+        f_new = fun(t_new, y_new)
+
+        slope = (y_new - y) / h
+        Q = np.column_stack((f, 3*slope - 2*f - f_new, f + f_new - 2*slope))
+        t_old, y_old = t, y
+        t, y, f = t_new, y_new, f_new
+        if t >= t_bound:
+            status = 0
+
+        terminal = ev.step(t_old, t, y, lambda s: _interpolate(t_old, h, y_old, Q, s))
+        if terminal is not None:
+            status = 1
+            t = terminal
+            y = _interpolate(t_old, h, y_old, Q, t)
+
+        ts.append(t)
+        ys.append(y)
+        if dense_output:
+            steps_t.append(t_new)
+            steps_y.append(y_old)
+            steps_Q.append(Q)
+
+    t_events, y_events = ev.result(n)
+    sol = DenseOutput(steps_t, steps_y, steps_Q) if dense_output and steps_Q else None
+    return Solution(np.array(ts), np.array(ys).T, t_events, y_events, nfev[0], status, MESSAGES[status], sol)
+
+class EnsembleSolution:
+    """
+    Результат ансамбля: для каждой траектории конечные время t[i] и
+    состояние y[i], время события t_events[i] (nan, если события не было)
+    и status[i] (0 - конец интервала, 1 - событие)
+    """
+    def __init__(self, t, y, t_events, status, nfev):
+        self.t = t
+        self.y = y
+        self.t_events = t_events
+        self.status = status
+        self.nfev = nfev
+        self.success = True
+
+def _hermite(y_old, f_old, y_new, f_new, h, x):
+    """Кубический эрмитов интерполянт шага по строкам; x - доля шага по строкам"""
+    x = x[:, np.newaxis]
+    slope = (y_new - y_old) / h
+    return y_old + h * x * (f_old + x * ((3*slope - 2*f_old - f_new) + x * (f_old + f_new - 2*slope)))
+
+def rk4_ensemble(fun, t_span, Y0, step, event=None, iterations=60):
+    """
+    RK4 с постоянным шагом для N траекторий одновременно (шаги синхронны).
+    Y0 - матрица N x n; fun(t, Y, rows) возвращает производные для строк
+    rows (индексы активных траекторий) одним вызовом. event(t, Y) - массив
+    значений по строкам; траектория, для которой event меняет знак
+    (с учетом event.direction), останавливается, момент события уточняется
+    бисекцией по эрмитову интерполянту шага. Остальные траектории продолжаются.
+    """
+    t0, t_bound = float(t_span[0]), float(t_span[1])
+    Y = np.array(Y0, dtype=np.float64)
+    count = Y.shape[0]
+    rows = np.arange(count)
+    F = np.asarray(fun(t0, Y, rows), dtype=np.float64)
+    nfev = 1
+
+    t_final = np.full(count, t_bound)
+    t_events = np.full(count, np.nan)
+    status = np.zeros(count, dtype=np.int8)
+    direction = getattr(event, 'direction', 0)
+    g = np.array(event(t0, Y), dtype=np.float64) if event is not None else None
+
+    t = t0
+    k = 0
+    while t < t_bound and rows.size:
+        k += 1
+        t_new = min(t0 + k * step, t_bound)
+        h = t_new - t
+
+        y, f = Y[rows], F[rows]
+        k2 = fun(t + h/2, y + h/2 * f, rows)
+        k3 = fun(t + h/2, y + h/2 * k2, rows)
+        k4 = fun(t_new, y + h * k3, rows)
+        y_new = y + h/6 * (f + 2*k2 + 2*k3 + k4)
+        f_new = np.asarray(fun(t_new, y_new, rows), dtype=np.float64)
+        nfev += 4
+        Y[rows] = y_new
+        F[rows] = f_new
+
+        if event is not None:
+            g_old, g_new = g[rows], event(t_new, y_new)
+            g[rows] = g_new
+            up = (g_old <= 0) & (g_new >= 0)
+            down = (g_old >= 0) & (g_new <= 0)
+            hit = up if direction > 0 else down if direction < 0 else up | down
+            if hit.any():
+                # бисекция по доле шага для сработавших строк
+                lo, hi = np.zeros(hit.sum()), np.ones(hit.sum())
+                args = (y[hit], f[hit], y_new[hit], f_new[hit], h)
+                g_lo = g_old[hit]
+                for _ in range(iterations):
+                    mid = (lo + hi) / 2
+                    g_mid = event(t + mid * h, _hermite(*args, mid))
+                    left = np.sign(g_mid) != np.sign(g_lo)
+                    hi = np.where(left, mid, hi)
+                    lo = np.where(left, lo, mid)
+                    g_lo = np.where(left, g_lo, g_mid)
+                stopped = rows[hit]
+                t_events[stopped] = t + hi * h
+                t_final[stopped] = t + hi * h
+                Y[stopped] = _hermite(*args, hi)
+                status[stopped] = 1
+                rows = rows[~hit]
+        t = t_new
+
+    return EnsembleSolution(t_final, Y, t_events, status, nfev)
+
+def solve(fun, t_span, y0, method='RK45', max_step=np.inf, rtol=1e-3, atol=1e-6, events=None, dense_output=False,
+          breakpoints=None, first_step=None):
+    """
+    Единая точка входа: method='RK45' (шаг не больше max_step, точность rtol/atol)
+    или 'RK4' (постоянный шаг max_step). С breakpoints (или событиями с
+    restart=True) интегрирование идет по сегментам, см. solve_segments;
+    первый шаг RK45 в сегменте - весь сегмент (не больше max_step).
+    """
+    if method == 'RK45':
+        if breakpoints is None and not any(getattr(e, 'restart', False) for e in _event_list(events)):
+            return rk45(fun, t_span, y0, max_step, rtol, atol, events, dense_output, first_step)
+        solver = lambda f, span, y, ev, dense: rk45(f, span, y, max_step, rtol, atol, ev, dense,
+                                                    segment_step(span, max_step))
+    elif method == 'RK4':
+        if not np.isfinite(max_step):
+            raise ValueError("RK4 needs a finite max_step")
+        solver = lambda f, span, y, ev, dense: rk4(f, span, y, max_step, ev, dense)
+    else:
+        raise ValueError(f"Unknown method {method}")
+    if breakpoints is None and not any(getattr(e, 'restart', False) for e in _event_list(events)):
+        return solver(fun, t_span, y0, events, dense_output)
+    return solve_segments(solver, fun, t_span, y0, breakpoints, events, dense_output)
+
+def segment_step(t_span, max_step=np.inf):
+    """
+    Первый шаг после перезапуска: правая часть гладкая до конца сегмента,
+    поэтому пробуется весь сегмент, при большой ошибке шаг уменьшится
+    """
+    return min(t_span[1] - t_span[0], max_step)
+
+def _event_list(events):
+    if events is None:
+        return []
+    return [events] if callable(events) else list(events)
+
+class SegmentedDenseOutput:
+    """Непрерывное решение, составленное из решений сегментов (starts - их начала)"""
+    def __init__(self, starts, pieces):
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.pieces = pieces
+
+    def __call__(self, t):
+        t = np.asarray(t, dtype=np.float64)
+        k = np.clip(np.searchsorted(self.starts, t, side='right') - 1, 0, len(self.pieces) - 1)
+        if t.ndim == 0:
+            return self.pieces[int(k)](t)
+        out = None
+        for j in np.unique(k):
+            mask = k == j
+            y = self.pieces[j](t[mask])
+            if out is None:
+                out = np.empty((len(y), len(t)))
+            out[:, mask] = y
+        return out
+
+class _SegmentEvent:
+    """
+    Событие внутри сегмента: terminal - сколько срабатываний осталось до
+    остановки. После перезапуска в корне события (t0) значение в начальной
+    точке берется со стороны side, чтобы корень не нашелся повторно.
+    """
+    def __init__(self, event, terminal, t0=None, side=0):
+        self.event = event
+        self.direction = getattr(event, 'direction', 0)
+        self.terminal = terminal
+        self.t0 = t0
+        self.side = side
+
+    def __call__(self, t, y):
+        g = self.event(t, y)
+        if t == self.t0:
+            return self.side * max(abs(g), EPS)
+        return g
+
+def solve_segments(solver, fun, t_span, y0, breakpoints=None, events=None, dense_output=False):
+    """
+    Интегрирование правой части с разрывами: решатель одного сегмента
+    solver(fun, t_span, y0, events, dense_output) перезапускается в каждом
+    моменте breakpoints (разрывы по времени) и в корнях событий с атрибутом
+    restart=True (разрывы по состоянию, например по высоте). Правая часть
+    считается непрерывной справа: в конце сегмента она берется в момент
+    чуть раньше разрыва, поэтому ни одна стадия шага не видит следующий
+    участок. Времена событий собираются по всем сегментам; в решении также
+    t_segments - начала сегментов.
+    """
+    events = _event_list(events)
+    restart = [bool(getattr(e, 'restart', False)) for e in events]
+    remaining = [_max_events(e) for e in events]
+    t0, t_bound = float(t_span[0]), float(t_span[1])
+    y = np.array(y0, dtype=np.float64)
+    n = y.size
+    bounds = sorted({float(b) for b in (breakpoints or ()) if t0 < b < t_bound}) + [t_bound]
+
+    ts, ys = [np.array([t0])], [y[:, np.newaxis]]
+    t_events = [[] for _ in events]
+    y_events = [[] for _ in events]
+    segments, starts, pieces = [], [], []
+    nfev = 0
+    status, message = 0, MESSAGES[0]
+    fired = None
+    i = 0
+    while True:
+        while bounds[i] <= t0:
+            i += 1
+        t_end = bounds[i]
+        left = np.nextafter(t_end, -np.inf)
+        seg_fun = lambda t, y, left=left: fun(min(t, left), y)
+
+        seg_events = []
+        for k, event in enumerate(events):
+            if restart[k]:
+                side = 0
+                if fired is not None and fired[0] == k:
+                    side = fired[1]
+                seg_events.append(_SegmentEvent(event, True, t0 if side else None, side))
+            else:
+                seg_events.append(_SegmentEvent(event, remaining[k] if np.isfinite(remaining[k]) else False))
+        g_start = [e(t0, y) if r and e.direction == 0 else 0.0 for e, r in zip(seg_events, restart)]
+
+        segments.append(t0)
+        sol = solver(seg_fun, (t0, t_end), y, seg_events, dense_output)
+        nfev += sol.nfev
+        ts.append(sol.t[1:])
+        ys.append(sol.y[:, 1:])
+        for k in range(len(events)):
+            t_events[k].extend(sol.t_events[k])
+            y_events[k].extend(sol.y_events[k])
+            remaining[k] -= len(sol.t_events[k])
+        if dense_output and sol.sol is not None:
+            starts.append(t0)
+            pieces.append(sol.sol)
+
+        if sol.status < 0:
+            status, message = sol.status, sol.message
+            break
+        t0, y = float(sol.t[-1]), sol.y[:, -1]
+        fired = None
+        if sol.status == 1:
+            hit = [k for k in range(len(events)) if len(sol.t_events[k]) and sol.t_events[k][-1] == t0]
+            stop = [k for k in hit if not restart[k] and remaining[k] <= 0]
+            if stop or not hit:
+                status, message = 1, MESSAGES[1]
+                break
+            k = hit[0]
+            side = seg_events[k].direction or -np.sign(g_start[k]) or 1.0
+            fired = (k, side)
+        elif t_end >= t_bound:
+            break
+
+    result = Solution(np.concatenate(ts), np.concatenate(ys, axis=1),
+                      [np.asarray(te) for te in t_events],
+                      [np.asarray(ye) if ye else np.empty((0, n)) for ye in y_events],
+                      nfev, status, message,
+                      SegmentedDenseOutput(starts, pieces) if pieces else None)
+    result.t_segments = np.asarray(segments)
+    return result
+
+if __name__ == "__main__":
+    import time
+    from scipy.integrate import solve_ivp
+    import ballistics
+
+    engine = ballistics.Trajectory(ballistics.parser)
+    y0 = [0, math.pi/2, 10.0, 100.0, 0.1]
+
+    def best_time(method, repeat=5):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            sol = engine.run(y0, method=method)
+            times.append(time.perf_counter() - start)
+        return min(times), sol
+
+    reference = solve_ivp(engine.system, (0, engine.parser.get_full_time()-1), y0, method='DOP853',
+                          max_step=engine.parser.interstep/200, rtol=1e-12, atol=1e-10)
+    print(f"{ballistics.rocket}: reference DOP853, {reference.nfev} calls")
+    base = None
+    for method in ('solve_ivp', 'RK45', 'RK4'):
+        elapsed, sol = best_time(method)
+        base = sol if base is None else base
+        print(f"{method:9s} {elapsed*1e3:7.1f} ms, {sol.nfev:5d} calls, "
+              f"vs solve_ivp: max |dy| {np.max(np.abs(sol.y[:, -1] - base.y[:, -1])):.3g}, "
+              f"vs reference: dV {sol.y[2, -1] - reference.y[2, -1]:+.2f} m/s, dH {sol.y[3, -1] - reference.y[3, -1]:+.1f} m")
+
+    # поколение differential_evolution (popsize=15, 2 коэффициента): 30 траекторий одним ансамблем
+    ensemble = ballistics.Ensemble(engine.parser)
+    rng = np.random.default_rng(0)
+    coefs = np.column_stack((rng.uniform(*ballistics.COEF1_RANGE, 30), rng.uniform(*ballistics.COEF2_RANGE, 30)))
+    times = []
+    for _ in range(5):
+        start = time.perf_counter()
+        ensemble.run(y0, coefs, attack_limit=30)
+        times.append(time.perf_counter() - start)
+    serial, _ = best_time('RK45')
+    print(f"ensemble of {len(coefs)}: {min(times)*1e3:.1f} ms ({min(times)/serial:.1f} RK45 trajectories)")
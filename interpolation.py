@@ -0,0 +1,63 @@
+from bisect import bisect_right
+import numpy as np
+
+# Общее ядро кусочно-линейной интерполяции табличных данных.
+# Узлы xp возрастают, точка x относится к интервалу [xp[i-1], xp[i]).
+# Вне таблицы (x < xp[0] или x >= xp[-1]) возвращается значение outside,
+# которое задает вызывающий код.
+
+def interval(x, xp):
+    """Индекс i, для которого xp[i-1] <= x < xp[i]; None вне таблицы"""
+    i = bisect_right(xp, x)
+    if i == 0 or i == len(xp):
+        return None
+    return i
+
+def linear(i, x, xp, fp):
+    """Линейная интерполяция на интервале i, найденном interval()"""
+    return fp[i - 1] + (x - xp[i - 1]) * (fp[i] - fp[i - 1]) / (xp[i] - xp[i - 1])
+
+def interp(x, xp, fp, outside=None):
+    """Скалярная интерполяция, O(log n)"""
+    i = bisect_right(xp, x)
+    if i == 0 or i == len(xp):
+        return outside
+    return fp[i - 1] + (x - xp[i - 1]) * (fp[i] - fp[i - 1]) / (xp[i] - xp[i - 1])
+
+def interp_array(x, xp, fp, outside=np.nan):
+    """Векторная интерполяция массива x с теми же правилами на краях"""
+    xp = np.asarray(xp, dtype=np.float64)
+    fp = np.asarray(fp, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    idx = np.clip(np.searchsorted(xp, x, side='right'), 1, len(xp) - 1)
+    x0 = xp[idx - 1]
+    res = fp[idx - 1] + (x - x0) * (fp[idx] - fp[idx - 1]) / (xp[idx] - x0)
+    return np.where((x >= xp[0]) & (x < xp[-1]), res, outside)
+
+class Table:
+    """
+    Таблица с запоминанием последнего интервала: для монотонных
+    последовательностей запросов (высота, Мах вдоль траектории)
+    поиск почти всегда заканчивается проверкой того же интервала
+    """
+    __slots__ = ('xp', 'fp', 'outside', 'last')
+
+    def __init__(self, xp, fp, outside=None):
+        self.xp = tuple(float(x) for x in xp)
+        self.fp = tuple(float(f) for f in fp)
+        self.outside = outside
+        self.last = 1
+
+    def __call__(self, x):
+        xp = self.xp
+        i = self.last
+        if not (xp[i - 1] <= x < xp[i]):
+            i = bisect_right(xp, x)
+            if i == 0 or i == len(xp):
+                return self.outside
+            self.last = i
+        fp = self.fp
+        return fp[i - 1] + (x - xp[i - 1]) * (fp[i] - fp[i - 1]) / (xp[i] - xp[i - 1])
+
+    def array(self, x):
+        return interp_array(x, self.xp, self.fp, np.nan if self.outside is None else self.outside)
@@ -1,4 +1,5 @@
 import os
 home=os.getcwd()
 root_path = home + "/resources/"
-rocket_lib = home + "/rocket_lib/"
\ No newline at end of file
+rocket_lib = home + "/rocket_lib/"
+cache_path = home + "/cache/"
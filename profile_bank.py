@@ -0,0 +1,150 @@
+import json
+import numpy as np
+import interpolation
+
+# Банк профилей атмосферы: один бинарный файл с заголовком и массивом
+# записей фиксированного размера. Файл отображается в память, поэтому
+# открытие банка не читает записи, а профиль k читает только свои страницы.
+#
+# Формат: HEADER_SIZE байт JSON-заголовка (дополнен пробелами), затем
+# count записей record_dtype(temperature_nodes, wind_nodes) в little-endian.
+
+BANK_VERSION = 1
+HEADER_SIZE = 4096
+
+def record_dtype(temperature_nodes, wind_nodes):
+    """Запись банка: число используемых узлов и таблицы T(H), W(H)"""
+    return np.dtype([
+        ('temperature_count', '<i4'),
+        ('wind_count', '<i4'),
+        ('HT', '<f8', (temperature_nodes,)),
+        ('TT', '<f8', (temperature_nodes,)),
+        ('windH', '<f8', (wind_nodes,)),
+        ('windV', '<f8', (wind_nodes,)),
+    ])
+
+class Profile:
+    """
+    Профиль атмосферы: узлы высот и значения температуры (HT, TT) и
+    скорости ветра (windH, windV). Таблицы интерполяции строятся один раз
+    для каждых значений вне узлов (T_outside, wind_outside).
+    """
+    __slots__ = ('HT', 'TT', 'windH', 'windV', '_tables', '_outside')
+
+    def __init__(self, HT, TT, windH, windV):
+        if len(HT) != len(TT) or len(windH) != len(windV):
+            raise ValueError("Profile node and value arrays must have equal length")
+        self.HT = HT
+        self.TT = TT
+        self.windH = windH
+        self.windV = windV
+        self._tables = None
+        self._outside = None
+
+    def tables(self, T_outside, wind_outside=0):
+        """(Table температуры, Table ветра) для atmosphere"""
+        outside = (T_outside, wind_outside)
+        if self._tables is None or self._outside != outside:
+            self._tables = (interpolation.Table(self.HT, self.TT, T_outside),
+                            interpolation.Table(self.windH, self.windV, wind_outside))
+            self._outside = outside
+        return self._tables
+
+class ProfileBank:
+    def __init__(self, filename, mode='r'):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            header = json.loads(f.read(HEADER_SIZE).decode())
+        if header.get('version') != BANK_VERSION:
+            raise ValueError(f"File {filename} is not a profile bank version {BANK_VERSION}")
+        self.header = header
+        self.count = header['count']
+        self.dtype = record_dtype(header['temperature_nodes'], header['wind_nodes'])
+        self.records = np.memmap(filename, dtype=self.dtype, mode=mode, offset=HEADER_SIZE, shape=(self.count,))
+        self._profiles = {}
+
+    @classmethod
+    def create(cls, filename, count, temperature_nodes, wind_nodes, description=""):
+        """Новый банк из count пустых записей, открытый на запись"""
+        header = json.dumps({
+            'version': BANK_VERSION,
+            'count': count,
+            'temperature_nodes': temperature_nodes,
+            'wind_nodes': wind_nodes,
+            'description': description,
+        }).encode()
+        if len(header) > HEADER_SIZE:
+            raise ValueError("Profile bank header is too long")
+        size = HEADER_SIZE + count * record_dtype(temperature_nodes, wind_nodes).itemsize
+        with open(filename, 'wb') as f:
+            f.write(header.ljust(HEADER_SIZE))
+            f.truncate(size)
+        return cls(filename, mode='r+')
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, k):
+        """Профиль k; массивы - представления отображенного файла"""
+        profile = self._profiles.get(k)
+        if profile is None:
+            if not -self.count <= k < self.count:
+                raise IndexError(f"Profile {k} is out of bank range {self.count}")
+            rec = self.records[k]
+            nt, nw = int(rec['temperature_count']), int(rec['wind_count'])
+            profile = Profile(rec['HT'][:nt], rec['TT'][:nt], rec['windH'][:nw], rec['windV'][:nw])
+            self._profiles[k] = profile
+        return profile
+
+    def __setitem__(self, k, profile):
+        rec = self.records[k]
+        nt, nw = len(profile.HT), len(profile.windH)
+        if nt > len(rec['HT']) or nw > len(rec['windH']):
+            raise ValueError("Profile has more nodes than the bank record")
+        rec['temperature_count'] = nt
+        rec['wind_count'] = nw
+        rec['HT'][:nt] = profile.HT
+        rec['TT'][:nt] = profile.TT
+        rec['windH'][:nw] = profile.windH
+        rec['windV'][:nw] = profile.windV
+        self._profiles.pop(k, None)
+
+    def flush(self):
+        self.records.flush()
+
+def write_bank(filename, profiles, description=""):
+    """Записывает список профилей в новый банк"""
+    profiles = list(profiles)
+    temperature_nodes = max(len(p.HT) for p in profiles)
+    wind_nodes = max(len(p.windH) for p in profiles)
+    bank = ProfileBank.create(filename, len(profiles), temperature_nodes, wind_nodes, description)
+    for k, profile in enumerate(profiles):
+        bank[k] = profile
+    bank.flush()
+    return ProfileBank(filename)
+
+def perturbed(base, count, seed=0, temperature_sigma=5.0, wind_sigma=3.0):
+    """
+    Случайные профили вокруг base: нормальные отклонения температуры (К)
+    и скорости ветра (м/с) в узлах, ветер не меньше нуля
+    """
+    rng = np.random.default_rng(seed)
+    HT, TT = np.asarray(base.HT, dtype=np.float64), np.asarray(base.TT, dtype=np.float64)
+    windH, windV = np.asarray(base.windH, dtype=np.float64), np.asarray(base.windV, dtype=np.float64)
+    for _ in range(count):
+        yield Profile(HT, TT + rng.normal(0, temperature_sigma, TT.shape),
+                      windH, np.maximum(windV + rng.normal(0, wind_sigma, windV.shape), 0))
+
+# Банк, из которого atmosphere берет профили по номеру
+_bank = None
+
+def use_bank(bank):
+    """Делает банк (объект или имя файла) текущим для get_profile"""
+    global _bank
+    _bank = bank if isinstance(bank, ProfileBank) else ProfileBank(bank)
+    return _bank
+
+def get_profile(k):
+    if _bank is None:
+        raise ValueError("No profile bank selected, call profile_bank.use_bank first")
+    return _bank[k]
@@ -0,0 +1,25 @@
+import os
+import time
+import atmosphere
+import path
+import profile_bank
+
+# Пример банка профилей: 10000 возмущенных стандартных профилей, запись,
+# открытие отображением в память и расчет атмосферы по номеру профиля
+
+filename = os.path.join(path.cache_path, "profiles_demo.bank")
+os.makedirs(path.cache_path, exist_ok=True)
+
+start = time.perf_counter()
+profile_bank.write_bank(filename, profile_bank.perturbed(atmosphere.STANDARD_PROFILE, 10000), "perturbed standard atmosphere")
+print(f"write 10000 profiles: {time.perf_counter() - start:.3f} s, {os.path.getsize(filename) / 2**20:.1f} MB")
+
+start = time.perf_counter()
+bank = profile_bank.use_bank(filename)
+print(f"open bank: {(time.perf_counter() - start) * 1e3:.3f} ms, {len(bank)} profiles")
+
+for k in (0, 4711, 9999):
+    atm = atmosphere.atmosphere(20000, profile=k)
+    print(f"profile {k}: T = {atm.get_T():.2f} K, density = {atm.get_density():.5f}, wind = {atm.get_wind():.2f} m/s")
+atm = atmosphere.atmosphere(20000)
+print(f"standard: T = {atm.get_T():.2f} K, density = {atm.get_density():.5f}, wind = {atm.get_wind():.2f} m/s")
@@ -0,0 +1,79 @@
+import numpy as np
+
+# Запись параметров траектории: значения берутся из непрерывного решения
+# интегратора (dense output) на равномерной сетке времени с шагом step,
+# то есть только по принятым шагам и монотонно по времени. Буферы numpy
+# выделяются заранее, их размер ограничен max_bytes.
+
+# Шаг записи по времени, с
+STEP = 0.25
+# Предельный объем буферов, байт
+MAX_BYTES = 16 * 2**20
+
+class Recorder:
+    def __init__(self, fields, step=STEP, max_bytes=MAX_BYTES):
+        self.fields = tuple(fields)
+        self._column = {name: k for k, name in enumerate(self.fields)}
+        self.step = step
+        self.capacity = max(int(max_bytes // (8 * len(self.fields))), 1)
+        self.buffer = np.empty((len(self.fields), 0))
+        self.count = 0
+        self.truncated = False
+
+    def reset(self, size=0):
+        """Очищает запись; буферы расширяются до size точек (не больше capacity)"""
+        size = min(size, self.capacity)
+        if self.buffer.shape[1] < size:
+            self.buffer = np.empty((len(self.fields), size))
+        self.count = 0
+        self.truncated = False
+
+    def times(self, t0, t1):
+        """Сетка записи на [t0, t1] с шагом step, конечная точка включается"""
+        grid = np.arange(t0, t1, self.step)
+        return np.append(grid, t1) if len(grid) == 0 or grid[-1] < t1 else grid
+
+    def append(self, values):
+        """Дописывает точку; False, если буферы заполнены"""
+        if self.count >= self.buffer.shape[1]:
+            self.truncated = True
+            return False
+        self.buffer[:, self.count] = values
+        self.count += 1
+        return True
+
+    def sample(self, sol, row, sink=None):
+        """
+        Запись решения sol (с dense output): row(t, y) - значения полей в
+        точке t состояния y. С sink (columnar.ColumnWriter) заполненные буферы
+        сбрасываются в него кусками, и в буферах остается только конец записи.
+        Решение вычисляется кусками по размеру буфера, так что память ограничена max_bytes.
+        """
+        grid = self.times(sol.t[0], sol.t[-1])
+        self.reset(len(grid))
+        size = self.buffer.shape[1]
+        for start in range(0, len(grid), size):
+            if start > 0:
+                if sink is None:
+                    self.truncated = True
+                    print(f"⚠️  Запись траектории ограничена {self.capacity} точками (до {grid[start]:.1f} с)")
+                    break
+                sink.append(self.columns())
+                self.count = 0
+            chunk = grid[start:start + size]
+            Y = sol.sol(chunk)
+            for k, t in enumerate(chunk):
+                self.append(row(t, Y[:, k]))
+        if sink is not None:
+            sink.append(self.columns())
+        return self.count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name):
+        """Записанный ряд name (представление буфера)"""
+        return self.buffer[self._column[name], :self.count]
+
+    def columns(self):
+        return {name: self[name] for name in self.fields}
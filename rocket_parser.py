@@ -1,7 +1,48 @@
+import glob
+import hashlib
 import json
+import os
 import attack
 import math
+import numpy as np
+from bisect import bisect_right
+from collections import namedtuple
 import constants
+import path
+
+# Версия расчета временной шкалы: входит в ключ кэша разобранных ракет
+PARSER_VERSION = 1
+
+# Состояние ракеты в момент времени (см. rocket_parser.state_at)
+RocketState = namedtuple('RocketState', ['mass', 'thrust', 'inertia', 'center', 'static'])
+
+# Запись временной шкалы: одна точка с шагом interstep
+TIMELINE_DTYPE = np.dtype([
+    ('time', '<f8'),
+    ('mass', '<f8'),
+    ('thrust', '<f8'),
+    ('static', '<f8'),
+    ('inertia', '<f8'),
+    ('center', '<f8'),
+])
+
+# Производные величины по ступеням, сохраняемые в кэше
+DERIVED_FIELDS = ('propellant_mass', 'mass_ox', 'mass_fu', 'delta_mass', 'work_time', 'stage_mass',
+                  'structural_mass', 'delta_mass_ox', 'delta_mass_fu', 'delta_level_ox', 'delta_level_fu')
+
+def cache_key(raw, interstep):
+    """Хеш содержимого JSON ракеты, шага и версии расчета"""
+    h = hashlib.sha1(raw)
+    h.update(json.dumps([PARSER_VERSION, interstep]).encode())
+    return h.hexdigest()[:16]
+
+def clear_cache(cache_dir=None):
+    """Удаляет кэш разобранных ракет, возвращает число удаленных файлов"""
+    cache_dir = path.cache_path if cache_dir is None else cache_dir
+    files = glob.glob(os.path.join(cache_dir, "parser_*.npy")) + glob.glob(os.path.join(cache_dir, "parser_*.json"))
+    for filename in files:
+        os.remove(filename)
+    return len(files)
 
 def read_propellant_density(propellant_type):
     density_map = {
@@ -21,12 +62,22 @@ def calculate_static(mass_, shoulder):
     return 0.5 * mass_ * shoulder
 
 def calculate_inertia(mass_, shoulder, shoulder_diff, diameter):
-    return 0.25 * mass_ * (math.pow(shoulder, 2) + 0.333 * math.pow(shoulder_diff, 2) + math.pow((diameter/2), 2))
+    return 0.25 * mass_ * (shoulder**2 + 0.333 * shoulder_diff**2 + (diameter/2)**2)
 
 class rocket_parser:
-    def __init__(self, filename):
-        with open(filename, 'r') as r_file:
-            r_data = json.load(r_file)
+    def __init__(self, filename, analytic=False, timeline=None, cache=True):
+        """
+        analytic=True - масса, тяга и инерция считаются точно в любой момент
+        (state_at), временная шкала и vector_*() не строятся.
+        timeline - готовая временная шкала (массив TIMELINE_DTYPE или файл
+        .npy из save_timeline) вместо расчета.
+        cache - брать производные величины и временную шкалу из кэша в
+        cache/ по хешу содержимого файла и сохранять их туда после расчета.
+        """
+        self.analytic = analytic
+        with open(filename, 'rb') as r_file:
+            raw = r_file.read()
+        r_data = json.loads(raw)
 
         self.name = r_data["name"]
         self.max_diameter = r_data["maximum_diameter"]
@@ -72,16 +123,21 @@ class rocket_parser:
         self.work_time = []
         self.full_time = []
 
-        self.thrust_vector = []
-        self.mass_vector = []
-        self.time_vector = []
-        self.static_vector = []
-        self.inertia_vector = []
-        self.center_vector = []
+        self.timeline = None
+        self.thrust_vector = None
+        self.mass_vector = None
+        self.time_vector = None
+        self.static_vector = None
+        self.inertia_vector = None
+        self.center_vector = None
         self.mass_ox = []
         self.mass_fu = []
 
-        for k in range(self.block_number):
+        use_cache = cache and not analytic and timeline is None
+        self.cache_key = cache_key(raw, self.interstep) if use_cache else None
+        cached = self._load_cache() if use_cache else False
+
+        for k in range(0 if cached else self.block_number):
             self.propellant_mass.append(self.block_mass[k] * self.structural_values[k] / (self.structural_values[k] + 1))
             self.mass_ox.append(self.propellant_mass[k] * self.components_ratio / (self.components_ratio + 1))
             self.mass_fu.append(self.propellant_mass[k] * 1 / (self.components_ratio + 1))
@@ -97,105 +153,193 @@ class rocket_parser:
             self.delta_level_ox.append(self.delta_mass_ox[k] / self.oxidizer_density / self.maximum_area)
             self.delta_level_fu.append(self.delta_mass_fu[k] / self.fuel_density / self.maximum_area)
 
-        # Инициализация переменных для расчета
-        time = 0
-        mass_t = self.full_mass
-        thrust_t = self.thrust[0]
-        
-        current_mass_ox = self.mass_ox.copy()
-        current_mass_fu = self.mass_fu.copy()
-        current_level_ox = [ox[-1] for ox in self.sector_index_ox]
-        current_level_fu = [fu[-1] for fu in self.sector_index_fu]
+        # Постоянные слагаемые статического момента и инерции по ступеням
+        self._terms = [self._stage_terms(s) for s in range(self.block_number)]
 
-        active_stage = 0
-        discarded_stages = []  # Отслеживаем отброшенные ступени
-        
-        while active_stage < self.block_number:
-            stage_end_mass = self.stage_mass[active_stage] - self.propellant_mass[active_stage]
-            
-            while mass_t > stage_end_mass and active_stage < self.block_number:
-                current_static = 0#static_payload
-                current_inertia = 0#inertia_payload
-                
-                # Учитываем только активные и еще не отброшенные ступени
-                for k in range(self.block_number):
-                    if k in discarded_stages:
-                        continue  # Пропускаем отброшенные ступени
-                        
-                    shoulder_str = self.sector_index_ox[k][0] + self.sector_index_fu[k][-1]
-                    shoulder_str_diff = abs(self.sector_index_ox[k][0] - self.sector_index_fu[k][-1])
-                    
-                    # Структурная масса учитывается всегда для всех ступеней, кроме отброшенных
-                    current_static += calculate_static(self.structural_mass[k], shoulder_str)
-                    current_inertia += calculate_inertia(self.structural_mass[k], shoulder_str, shoulder_str_diff, self.max_diameter)
-                
-                # Учет компонентов топлива
-                for k in range(active_stage, self.block_number):
-                    if k in discarded_stages:
-                        continue  # Пропускаем отброшенные ступени
-                        
-                    if k == active_stage:
-                        # Активная ступень - используем текущие уровни
-                        shoulder_ox = self.sector_index_ox[k][0] + current_level_ox[k]
-                        shoulder_fu = self.sector_index_fu[k][0] + current_level_fu[k]
-                        current_static += calculate_static(current_mass_ox[k], shoulder_ox)
-                        current_static += calculate_static(current_mass_fu[k], shoulder_fu)
-                        current_inertia += calculate_inertia(current_mass_ox[k], shoulder_ox, 
-                                                           abs(self.sector_index_ox[k][0] - current_level_ox[k]), 
-                                                           self.max_diameter)
-                        current_inertia += calculate_inertia(current_mass_fu[k], shoulder_fu,
-                                                           abs(self.sector_index_fu[k][0] - current_level_fu[k]),
-                                                           self.max_diameter)
-                    else:
-                        # Неактивные ступени - полные баки
-                        shoulder_ox = self.sector_index_ox[k][0] + self.sector_index_ox[k][-1]
-                        shoulder_fu = self.sector_index_fu[k][0] + self.sector_index_fu[k][-1]
-                        current_static += calculate_static(self.mass_ox[k], shoulder_ox)
-                        current_static += calculate_static(self.mass_fu[k], shoulder_fu)
-                        current_inertia += calculate_inertia(self.mass_ox[k], shoulder_ox,
-                                                           abs(self.sector_index_ox[k][0] - self.sector_index_ox[k][-1]),
-                                                           self.max_diameter)
-                        current_inertia += calculate_inertia(self.mass_fu[k], shoulder_fu,
-                                                           abs(self.sector_index_fu[k][0] - self.sector_index_fu[k][-1]),
-                                                           self.max_diameter)
-                
-                # Сохраняем векторы
-                self.mass_vector.append(mass_t)
-                self.time_vector.append(time)
-                self.thrust_vector.append(thrust_t)
-                self.static_vector.append(current_static)
-                self.inertia_vector.append(current_inertia)
-                self.center_vector.append(current_static / mass_t if mass_t > 0 else 0)
-                
-                # Обновляем параметры
-                mass_t -= self.delta_mass[active_stage] * self.interstep
-                current_mass_ox[active_stage] -= self.delta_mass_ox[active_stage] * self.interstep
-                current_mass_fu[active_stage] -= self.delta_mass_fu[active_stage] * self.interstep
-                current_level_ox[active_stage] -= self.delta_level_ox[active_stage] * self.interstep
-                current_level_fu[active_stage] -= self.delta_level_fu[active_stage] * self.interstep
-                
-                time += self.interstep
-            
-            # Отбрасываем отработавшую ступень
-            discarded_stages.append(active_stage)
-            mass_t -= self.structural_mass[active_stage]
-            active_stage += 1
-            
-            if active_stage < self.block_number:
-                thrust_t = self.thrust[active_stage]
-            else:
-                thrust_t = 0
-        
-        # Финальная точка
-        # self.mass_vector.append(mass_t)
-        # self.time_vector.append(time)
-        # self.thrust_vector.append(thrust_t)
-        # self.static_vector.append(static_payload)
-        # self.inertia_vector.append(inertia_payload)
-        # self.center_vector.append(static_payload / mass_t if mass_t > 0 else 0)
-        
+        # Границы работы ступеней
+        self.stage_end = []
+        for k in range(self.block_number):
+            self.stage_end.append(sum(self.work_time[:k + 1]))
+
+        # Временная шкала массы, тяги, статического момента и инерции
+        if analytic or cached:
+            pass
+        elif timeline is not None:
+            self.load_timeline(timeline)
+        else:
+            self.build_timeline()
+            if use_cache:
+                self._save_cache()
         self.full_time = sum(self.work_time)
-        
+
+    def _cache_files(self):
+        base = os.path.join(path.cache_path, "parser_" + self.cache_key)
+        return base + ".json", base + ".npy"
+
+    def _load_cache(self):
+        """Производные величины и временная шкала из кэша; False - промах"""
+        derived_file, timeline_file = self._cache_files()
+        if not (os.path.exists(derived_file) and os.path.exists(timeline_file)):
+            print(f"rocket_parser cache miss: {self.name} ({self.cache_key})")
+            return False
+        with open(derived_file, 'r') as f:
+            derived = json.load(f)
+        for name in DERIVED_FIELDS:
+            setattr(self, name, derived[name])
+        self.load_timeline(timeline_file)
+        print(f"rocket_parser cache hit: {self.name} ({self.cache_key})")
+        return True
+
+    def _save_cache(self):
+        # временная шкала записывается первой, производные величины - последними:
+        # по наличию .json кэш всегда находит полную шкалу
+        derived_file, timeline_file = self._cache_files()
+        os.makedirs(path.cache_path, exist_ok=True)
+        self.save_timeline(timeline_file)
+        temp = f"{derived_file}.{os.getpid()}.tmp"
+        with open(temp, 'w') as f:
+            json.dump({name: getattr(self, name) for name in DERIVED_FIELDS}, f)
+        os.replace(temp, derived_file)
+
+    def _stage_terms(self, s):
+        """
+        Слагаемые, не зависящие от времени при активной ступени s:
+        конструкция неотброшенных ступеней и полные баки верхних ступеней
+        """
+        struct_static = 0
+        struct_inertia = 0
+        for k in range(s, self.block_number):
+            shoulder_str = self.sector_index_ox[k][0] + self.sector_index_fu[k][-1]
+            shoulder_str_diff = abs(self.sector_index_ox[k][0] - self.sector_index_fu[k][-1])
+            struct_static += calculate_static(self.structural_mass[k], shoulder_str)
+            struct_inertia += calculate_inertia(self.structural_mass[k], shoulder_str, shoulder_str_diff, self.max_diameter)
+
+        upper_static = []
+        upper_inertia = []
+        for k in range(s + 1, self.block_number):
+            shoulder_ox = self.sector_index_ox[k][0] + self.sector_index_ox[k][-1]
+            shoulder_fu = self.sector_index_fu[k][0] + self.sector_index_fu[k][-1]
+            upper_static.append(calculate_static(self.mass_ox[k], shoulder_ox))
+            upper_static.append(calculate_static(self.mass_fu[k], shoulder_fu))
+            upper_inertia.append(calculate_inertia(self.mass_ox[k], shoulder_ox,
+                                                   abs(self.sector_index_ox[k][0] - self.sector_index_ox[k][-1]),
+                                                   self.max_diameter))
+            upper_inertia.append(calculate_inertia(self.mass_fu[k], shoulder_fu,
+                                                   abs(self.sector_index_fu[k][0] - self.sector_index_fu[k][-1]),
+                                                   self.max_diameter))
+        return struct_static, struct_inertia, upper_static, upper_inertia
+
+    def mass_properties(self, s, mass_ox, mass_fu, level_ox, level_fu):
+        """
+        (статический момент, момент инерции) при активной ступени s
+        по текущим массам и уровням ее компонентов (числа или массивы)
+        """
+        struct_static, struct_inertia, upper_static, upper_inertia = self._terms[s]
+        shoulder_ox = self.sector_index_ox[s][0] + level_ox
+        shoulder_fu = self.sector_index_fu[s][0] + level_fu
+
+        static = struct_static + calculate_static(mass_ox, shoulder_ox)
+        static = static + calculate_static(mass_fu, shoulder_fu)
+        for term in upper_static:
+            static = static + term
+
+        inertia = struct_inertia + calculate_inertia(mass_ox, shoulder_ox, abs(self.sector_index_ox[s][0] - level_ox), self.max_diameter)
+        inertia = inertia + calculate_inertia(mass_fu, shoulder_fu, abs(self.sector_index_fu[s][0] - level_fu), self.max_diameter)
+        for term in upper_inertia:
+            inertia = inertia + term
+        return static, inertia
+
+    def stage_times(self):
+        """Моменты окончания работы ступеней (для событий интегратора)"""
+        return list(self.stage_end)
+
+    def _countdown(self, start, step, end=None, count=None):
+        """
+        Последовательность start, start - step, start - 2*step, ... с тем же
+        накоплением округлений, что и при вычитании в цикле. Если задан end -
+        все значения до первого не большего end (не включая его) и само это
+        значение; иначе count + 1 значений.
+        """
+        if count is None:
+            count = max(int(math.ceil((start - end) / step)), 0) + 2
+            while True:
+                values = np.cumsum(np.concatenate(([start], np.full(count, -step))))
+                below = values <= end
+                if below.any():
+                    count = int(np.argmax(below))
+                    return values[:count + 1]
+                count *= 2
+        return np.cumsum(np.concatenate(([start], np.full(count, -step))))
+
+    def build_timeline(self):
+        """
+        Временная шкала с шагом interstep, построенная по ступеням массивами:
+        в пределах ступени масса, массы и уровни компонентов убывают
+        линейно, статический момент и инерция - их явные функции
+        """
+        h = self.interstep
+        mass_t = self.full_mass
+        mass, thrust, static, inertia = [], [], [], []
+
+        for s in range(self.block_number):
+            stage_end_mass = self.stage_mass[s] - self.propellant_mass[s]
+            stage_mass = self._countdown(mass_t, self.delta_mass[s] * h, end=stage_end_mass)
+            count = len(stage_mass) - 1
+            mass_t = stage_mass[-1] - self.structural_mass[s]
+            stage_mass = stage_mass[:count]
+
+            # Компоненты активной ступени
+            mass_ox = self._countdown(self.mass_ox[s], self.delta_mass_ox[s] * h, count=count)[:count]
+            mass_fu = self._countdown(self.mass_fu[s], self.delta_mass_fu[s] * h, count=count)[:count]
+            level_ox = self._countdown(self.sector_index_ox[s][-1], self.delta_level_ox[s] * h, count=count)[:count]
+            level_fu = self._countdown(self.sector_index_fu[s][-1], self.delta_level_fu[s] * h, count=count)[:count]
+
+            stage_static, stage_inertia = self.mass_properties(s, mass_ox, mass_fu, level_ox, level_fu)
+
+            mass.append(stage_mass)
+            thrust.append(np.full(count, float(self.thrust[s])))
+            static.append(stage_static)
+            inertia.append(stage_inertia)
+
+        timeline = np.empty(sum(len(m) for m in mass), dtype=TIMELINE_DTYPE)
+        timeline['mass'] = np.concatenate(mass)
+        timeline['thrust'] = np.concatenate(thrust)
+        timeline['static'] = np.concatenate(static)
+        timeline['inertia'] = np.concatenate(inertia)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            timeline['center'] = np.where(timeline['mass'] > 0, timeline['static'] / timeline['mass'], 0.0)
+        if len(timeline):
+            timeline['time'][0] = 0.0
+            timeline['time'][1:] = np.cumsum(np.full(len(timeline) - 1, float(h)))
+        self.set_timeline(timeline)
+
+    def set_timeline(self, timeline):
+        """Устанавливает временную шкалу; *_vector - представления ее столбцов"""
+        if timeline.dtype != TIMELINE_DTYPE:
+            raise ValueError(f"Timeline dtype {timeline.dtype} does not match {TIMELINE_DTYPE}")
+        self.timeline = timeline
+        self.time_vector = timeline['time']
+        self.mass_vector = timeline['mass']
+        self.thrust_vector = timeline['thrust']
+        self.static_vector = timeline['static']
+        self.inertia_vector = timeline['inertia']
+        self.center_vector = timeline['center']
+
+    def save_timeline(self, filename):
+        """Сохраняет временную шкалу в .npy (через временный файл: отображенный в память файл не перезаписывается)"""
+        if not filename.endswith('.npy'):
+            filename += '.npy'
+        temp = f"{filename}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            np.save(f, self.timeline)
+        os.replace(temp, filename)
+
+    def load_timeline(self, timeline):
+        """Временная шкала из массива или файла .npy (отображается в память, не читается целиком)"""
+        if isinstance(timeline, np.ndarray):
+            self.set_timeline(timeline)
+        else:
+            self.set_timeline(np.load(timeline, mmap_mode='r'))
 
     def get_block_number(self):
         return self.block_number
@@ -257,25 +401,108 @@ class rocket_parser:
         return self.center_vector
     def vector_thrust(self):
         return self.thrust_vector
+    def _floor_index(self, time):
+        """
+        Индекс последней точки шкалы не позже time (-1 - раньше начала).
+        Начальное приближение time / interstep уточняется по соседним точкам.
+        """
+        at = self.time_vector.item
+        n = len(self.timeline)
+        k = int(time / self.interstep) if time >= 0 else -1
+        if k >= n:
+            k = n - 1
+        while k + 1 < n and at(k + 1) <= time:
+            k += 1
+        while k >= 0 and at(k) > time:
+            k -= 1
+        return k
+
+    def time_index(self, time):
+        """
+        Индекс первой точки временной шкалы в пределах шага от time
+        (как прежний линейный поиск), None - если такой точки нет.
+        Индекс считается по time / interstep: O(1) вместо O(n).
+        """
+        at = self.time_vector.item
+        n = len(self.timeline)
+        h = self.interstep
+        k = max(self._floor_index(time - h), 0)
+        while k < n and at(k) - time < h:
+            if abs(at(k) - time) < h:
+                return k
+            k += 1
+        return None
+
+    def state_at(self, time, interpolate=False):
+        """
+        Масса, тяга, момент инерции, центр масс и статический момент в момент time.
+        Берется последняя точка шкалы не позже time, при interpolate=True -
+        линейная интерполяция до следующей точки (на разделении ступеней
+        скачок массы размазывается на один шаг). До старта - начальная точка,
+        после окончания работы последней ступени - последняя точка с нулевой тягой.
+        """
+        if self.analytic:
+            return self._analytic_state(time)
+
+        k = self._floor_index(time)
+        if k < 0:
+            k, time = 0, self.time_vector.item(0)
+        t0, mass, thrust, static, inertia, center = self.timeline.item(k)
+        if k == len(self.timeline) - 1:
+            if time - t0 >= self.interstep:
+                thrust = 0
+            return RocketState(mass, thrust, inertia, center, static)
+
+        if not interpolate:
+            return RocketState(mass, thrust, inertia, center, static)
+
+        t1, mass1, thrust1, static1, inertia1, center1 = self.timeline.item(k + 1)
+        w = (time - t0) / (t1 - t0)
+        return RocketState(mass + w * (mass1 - mass), thrust + w * (thrust1 - thrust), inertia + w * (inertia1 - inertia),
+                           center + w * (center1 - center), static + w * (static1 - static))
+
+    def _analytic_state(self, time):
+        """
+        Точное состояние: в пределах ступени массы и уровни компонентов
+        линейны по времени, статический момент и инерция - квадратичны.
+        После окончания работы последней ступени - ее конечное состояние
+        с нулевой тягой.
+        """
+        s = bisect_right(self.stage_end, time)
+        if s < self.block_number:
+            tau = time - (self.stage_end[s - 1] if s > 0 else 0)
+            if tau < 0:
+                tau = 0
+            thrust = self.thrust[s]
+        else:
+            s = self.block_number - 1
+            tau = self.work_time[s]
+            thrust = 0
+
+        mass = self.stage_mass[s] - self.delta_mass[s] * tau
+        mass_ox = self.mass_ox[s] - self.delta_mass_ox[s] * tau
+        mass_fu = self.mass_fu[s] - self.delta_mass_fu[s] * tau
+        level_ox = self.sector_index_ox[s][-1] - self.delta_level_ox[s] * tau
+        level_fu = self.sector_index_fu[s][-1] - self.delta_level_fu[s] * tau
+        static, inertia = self.mass_properties(s, mass_ox, mass_fu, level_ox, level_fu)
+        center = static / mass if mass > 0 else 0
+        return RocketState(mass, thrust, inertia, center, static)
+
+    def _value_at(self, time, name):
+        if self.analytic:
+            return getattr(self.state_at(time), name)
+        k = self.time_index(time)
+        if k is not None:
+            return self.timeline[name].item(k)
+
     def get_mass_from_time(self, time):
-        for k in range(len(self.time_vector)):
-            if abs(self.time_vector[k]-time)<self.interstep:
-                return self.mass_vector[k]
+        return self._value_at(time, 'mass')
     def get_thrust_from_time(self, time):
-        for k in range(len(self.time_vector)):
-            if abs(self.time_vector[k]-time)<self.interstep:
-                return self.thrust_vector[k]
+        return self._value_at(time, 'thrust')
     def get_inertia_from_time(self, time):
-        for k in range(len(self.inertia_vector)):
-            if abs(self.time_vector[k]-time)<self.interstep:
-                return self.inertia_vector[k]    
+        return self._value_at(time, 'inertia')
     def get_center_from_time(self, time):
-        for k in range(len(self.center_vector)):
-            if abs(self.time_vector[k]-time)<self.interstep:
-                return self.center_vector[k]       
+        return self._value_at(time, 'center')
 
     def get_propellant_from_time(self, time):
-        for k in range(len(self.time_vector)):
-            if abs(self.time_vector[k]-time)<self.interstep:
-                return self.thrust_vector[k]
-
+        return self._value_at(time, 'thrust')